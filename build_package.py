@@ -14,19 +14,9 @@ import sys
 def run_command(command):
     """运行命令并打印输出"""
     print(f"执行: {command}")
-    process = subprocess.Popen(
-        command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        universal_newlines=True,
-    )
-
-    for line in process.stdout:
-        print(line.strip())
-
-    process.wait()
-    return process.returncode
+    # 刷新已有输出，子进程直接继承标准输出，避免逐行解码转发
+    sys.stdout.flush()
+    return subprocess.run(command, shell=True, stderr=subprocess.STDOUT).returncode
 
 
 def build_package():
@@ -8,14 +8,14 @@ WebService监控工具运行脚本
 
 import os
 import sys
+import array
 import time
 import signal
 import logging
 import argparse
-import multiprocessing
+import threading
 from pathlib import Path
-import json
-import datetime
+from datetime import datetime
 
 # 确保能找到包
 project_root = Path(__file__).resolve().parent.parent
@@ -23,23 +23,33 @@ sys.path.insert(0, str(project_root))
 
 from webservice_monitor.utils.logger import setup_logger
 from webservice_monitor.core.monitor import WebServiceMonitor
+from webservice_monitor.db import repository
 from webservice_monitor.utils.config import load_config
+from webservice_monitor.utils import serialization
 
 # 全局变量
 monitor = None
-running = True
+stop_event = threading.Event()
 logger = None
 
+# 状态目录和文件路径，启动时确定一次
+_STATUS_DIR = Path(os.path.expanduser("~")) / ".webservice_monitor"
+_STATUS_DIR.mkdir(parents=True, exist_ok=True)
+_STATUS_FILE = _STATUS_DIR / "monitor_status.json"
+_PID_FILE = _STATUS_DIR / "monitor.pid"
+
+# 上次写入的状态内容哈希(不含last_update)
+_last_status_hash = None
+
 
 def signal_handler(signum, frame):
     """处理终止信号"""
-    global running, monitor, logger
+    global monitor, logger
 
-    signal_name = "UNKNOWN"
-    for name, value in signal.__dict__.items():
-        if isinstance(value, int) and value == signum and name.startswith("SIG"):
-            signal_name = name
-            break
+    try:
+        signal_name = signal.Signals(signum).name
+    except ValueError:
+        signal_name = "UNKNOWN"
 
     logger.info(f"收到信号 {signal_name} ({signum})，准备处理...")
 
@@ -47,64 +57,61 @@ def signal_handler(signum, frame):
     if hasattr(signal, "SIGHUP") and signum == signal.SIGHUP:
         logger.info("处理配置重载请求...")
         try:
-            # 保存当前配置ID
-            current_configs = list(monitor.configurations.keys()) if monitor else []
-
-            # 重新启动监控
-            if monitor:
-                logger.info("停止当前监控...")
-                monitor.stop()
-
-            logger.info("启动带有更新配置的监控...")
-            monitor = WebServiceMonitor()
-            success = monitor.start(current_configs)
-
-            if success:
-                logger.info(
-                    f"配置已重新加载，正在监控 {len(monitor.configurations)} 个配置"
-                )
-            else:
-                logger.error("重新加载配置失败")
+            if monitor is None:
+                logger.warning("监控尚未启动，忽略配置重载请求")
+                return
+
+            # 仅保留当前正在监控的配置ID，就地应用配置差异而不重启监控
+            current_configs = set(monitor.configurations)
+            configs = repository.get_all_configurations(active_only=True)
+            added, removed, changed = monitor.apply_config_delta(
+                {c.id: c for c in configs if c.id in current_configs}
+            )
+            logger.info(
+                f"配置已重新加载，正在监控 {len(monitor.configurations)} 个配置 "
+                f"(移除 {len(removed)}, 变更 {len(changed)})"
+            )
         except Exception as e:
             logger.exception(f"重新加载配置时出错: {e}")
     else:
         # 其他信号（如SIGTERM, SIGINT）用于终止程序
         logger.info(f"准备终止程序...")
-        running = False
+        stop_event.set()
+
+
+def _write_status_atomic(status_file, status):
+    """原子地写入状态文件，避免读取方看到写了一半的内容"""
+    tmp_file = status_file.with_name(status_file.name + ".tmp")
+    with open(tmp_file, "wb", buffering=65536) as f:
+        f.write(serialization.dumps(status))
+    os.replace(tmp_file, status_file)
 
 
 def write_pid_file(pid):
     """写入PID文件"""
-    pid_dir = os.path.join(os.path.expanduser("~"), ".webservice_monitor")
-    os.makedirs(pid_dir, exist_ok=True)
-
-    pid_file = os.path.join(pid_dir, "monitor.pid")
-    with open(pid_file, "w") as f:
-        f.write(str(pid))
+    fd = os.open(_PID_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, f"{pid}\n".encode())
+    finally:
+        os.close(fd)
 
-    return pid_file
+    return _PID_FILE
 
 
 def update_status_file(status):
     """更新状态文件"""
-    status_dir = os.path.join(os.path.expanduser("~"), ".webservice_monitor")
-    os.makedirs(status_dir, exist_ok=True)
-
-    status_file = os.path.join(status_dir, "monitor_status.json")
-
     # 添加时间戳
-    status["last_update"] = datetime.datetime.now().isoformat()
+    status["last_update"] = datetime.now().isoformat()
 
-    with open(status_file, "w") as f:
-        json.dump(status, f)
+    _write_status_atomic(_STATUS_FILE, status)
 
 
 def run_monitor(config_file=None, config_ids=None):
     """运行监控服务"""
-    global monitor, logger, running
+    global monitor, logger
 
     # 初始化时记录启动时间
-    start_time = datetime.datetime.now()
+    start_time = datetime.now()
 
     # 设置日志
     logger = setup_logger()
@@ -113,6 +120,9 @@ def run_monitor(config_file=None, config_ids=None):
     pid_file = write_pid_file(os.getpid())
     logger.info(f"进程ID: {os.getpid()}, PID文件: {pid_file}")
 
+    if config_ids:
+        logger.info(f"将监控以下配置ID: {config_ids.tolist()}")
+
     # 加载配置
     if config_file:
         load_config(config_file)
@@ -134,17 +144,10 @@ def run_monitor(config_file=None, config_ids=None):
 
             # 初始状态更新
             update_status(monitor, start_time)
-            last_status_update = time.time()
 
-            # 保持程序运行，直到收到退出信号
-            while running:
-                time.sleep(1)
-
-                # 每60秒更新一次状态
-                current_time = time.time()
-                if current_time - last_status_update >= 60:
-                    update_status(monitor, start_time)
-                    last_status_update = current_time
+            # 阻塞等待退出信号，每60秒超时一次用于更新状态
+            while not stop_event.wait(timeout=60):
+                update_status(monitor, start_time)
 
             # 优雅退出
             logger.info("正在停止监控...")
@@ -178,29 +181,38 @@ def run_monitor(config_file=None, config_ids=None):
 
 def update_status(monitor, start_time):
     """更新状态文件"""
+    global _last_status_hash
+
     if not monitor:
         return
 
     try:
-        status_dir = os.path.join(os.path.expanduser("~"), ".webservice_monitor")
-        os.makedirs(status_dir, exist_ok=True)
-
-        status_file = os.path.join(status_dir, "monitor_status.json")
-
         # 收集状态信息
+        configs_list = monitor.get_configs_snapshot()
         status = {
             "running": True,
             "start_time": start_time.isoformat(),
-            "configs_count": len(monitor.configurations),
-            "configs": [
-                {"id": k, "name": v.name} for k, v in monitor.configurations.items()
-            ],
+            "start_ts": start_time.timestamp(),
+            "configs_count": len(configs_list),
+            "configs": configs_list,
             "pid": os.getpid(),
-            "last_update": datetime.datetime.now().isoformat(),
         }
 
-        with open(status_file, "w") as f:
-            json.dump(status, f)
+        # 内容未变化时只刷新文件修改时间，读取方据此判断状态是否过期
+        status_hash = hash(serialization.dumps(status))
+        if status_hash == _last_status_hash:
+            try:
+                os.utime(_STATUS_FILE, None)
+                logger.debug("状态未变化，已刷新状态文件时间戳")
+                return
+            except OSError:
+                # 状态文件被删除等情况，重新完整写入
+                pass
+
+        status["last_update"] = datetime.now().isoformat()
+        status["last_update_ts"] = time.time()
+        _write_status_atomic(_STATUS_FILE, status)
+        _last_status_hash = status_hash
 
         logger.debug("状态文件已更新")
     except Exception as e:
@@ -210,26 +222,24 @@ def update_status(monitor, start_time):
 def update_status_stopped():
     """更新状态为已停止"""
     try:
-        status_dir = os.path.join(os.path.expanduser("~"), ".webservice_monitor")
-        status_file = os.path.join(status_dir, "monitor_status.json")
-
         # 如果文件存在，读取然后更新
-        if os.path.exists(status_file):
-            with open(status_file, "r") as f:
-                status = json.load(f)
+        if _STATUS_FILE.exists():
+            with open(_STATUS_FILE, "rb") as f:
+                status = serialization.loads(f.read())
         else:
             status = {}
 
+        now_iso = datetime.now().isoformat()
         status.update(
             {
                 "running": False,
-                "stop_time": datetime.datetime.now().isoformat(),
-                "last_update": datetime.datetime.now().isoformat(),
+                "stop_time": now_iso,
+                "last_update": now_iso,
+                "last_update_ts": time.time(),
             }
         )
 
-        with open(status_file, "w") as f:
-            json.dump(status, f)
+        _write_status_atomic(_STATUS_FILE, status)
     except Exception as e:
         if logger:
             logger.exception(f"更新停止状态时出错: {e}")
@@ -246,8 +256,8 @@ def main():
     config_ids = None
     if args.config_ids:
         try:
-            config_ids = [int(x.strip()) for x in args.config_ids.split(",")]
-            logger.info(f"将监控以下配置ID: {config_ids}")
+            config_ids = array.array("i")
+            config_ids.extend(int(x) for x in args.config_ids.split(",") if x.strip())
         except ValueError as e:
             print(f"错误: 配置ID必须是整数: {e}")
             return 1
@@ -255,13 +265,13 @@ def main():
             print(f"解析配置ID时出错: {e}")
             return 1
 
+        # 空列表会被当作未指定而监控全部配置
+        if not config_ids:
+            print(f"错误: 未指定有效的配置ID: '{args.config_ids}'")
+            return 1
+
     return run_monitor(args.config_file, config_ids)
 
 
 if __name__ == "__main__":
-    # 使用multiprocessing启动，解决Windows上的daemon线程问题
-    multiprocessing.freeze_support()
-    sys.exit(main())
-
-    multiprocessing.freeze_support()
     sys.exit(main())
@@ -2,18 +2,14 @@
 # -*- coding: utf-8 -*-
 
 from setuptools import setup, find_packages
-import os
+from pathlib import Path
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
 
 def package_files(directory):
-    paths = []
-    for path, directories, filenames in os.walk(directory):
-        for filename in filenames:
-            paths.append(os.path.join("..", path, filename))
-    return paths
+    return [str(Path("..") / p) for p in Path(directory).rglob("*") if p.is_file()]
 
 
 extra_files = package_files("webservice_monitor/scripts")
@@ -51,6 +47,8 @@ setup(
         "numpy>=1.20.0",
         "statsmodels>=0.13.0",
         "seaborn>=0.11.0",
+        "orjson>=3.6.0",
+        "aiohttp>=3.8.0",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,126 @@
+"""
+异步批量调用的单元测试
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from webservice_monitor.core.async_caller import AsyncBatchCaller, _call_one, aiohttp
+from webservice_monitor.db.models import Configuration
+
+if aiohttp is not None:
+    from aiohttp import web
+    from aiohttp import test_utils
+
+
+def _failing_session(error: BaseException) -> MagicMock:
+    """request()直接抛出指定异常的模拟会话"""
+    session = MagicMock()
+    session.request.side_effect = error
+    return session
+
+
+@unittest.skipUnless(AsyncBatchCaller.available(), "需要aiohttp")
+class TestCallOne(unittest.TestCase):
+    def setUp(self):
+        self.config = Configuration(id=1, name="Test API", url="http://test/")
+
+    def _call(self, error: BaseException):
+        return asyncio.run(_call_one(_failing_session(error), self.config))
+
+    def test_timeout(self):
+        result = self._call(asyncio.TimeoutError())
+        self.assertEqual(result.status_code, -1)
+        self.assertEqual(result.error_message, "请求超时")
+
+    def test_connection_error(self):
+        result = self._call(aiohttp.ClientConnectionError("refused"))
+        self.assertEqual(result.status_code, -1)
+        self.assertEqual(result.error_message, "连接错误")
+
+    def test_other_exception(self):
+        result = self._call(ValueError("boom"))
+        self.assertEqual(result.status_code, -1)
+        self.assertEqual(result.error_message, "boom")
+        self.assertEqual(result.config_id, 1)
+        self.assertGreaterEqual(result.response_time, 0)
+
+
+@unittest.skipUnless(AsyncBatchCaller.available(), "需要aiohttp")
+class TestAsyncBatchCaller(unittest.TestCase):
+    def setUp(self):
+        self.caller = AsyncBatchCaller()
+        self.addCleanup(self.caller.close)
+        self.loop = self.caller._ensure_loop()
+
+        # 测试服务器运行在调用器的事件循环中
+        async def handle(request):
+            if request.path == "/slow":
+                await asyncio.sleep(5)
+            return web.Response(status=201 if request.method == "POST" else 200)
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        self.server = test_utils.TestServer(app)
+        self._run(self.server.start_server())
+        self.addCleanup(self._stop_server)
+
+    def _stop_server(self):
+        """停止测试服务器，事件循环已随调用器关闭时无需处理"""
+        if not self.loop.is_closed():
+            self._run(self.server.close())
+
+    def _run(self, coro):
+        """在调用器的事件循环中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout=10)
+
+    def _config(self, path: str, **kwargs) -> Configuration:
+        return Configuration(
+            id=1, name="Test API", url=str(self.server.make_url(path)), **kwargs
+        )
+
+    def test_call_batch(self):
+        results = self.caller.call_batch(self._config("/ok", calls_per_batch=3))
+        self.assertEqual([r.status_code for r in results], [200, 200, 200])
+
+        results = self.caller.call_batch(
+            self._config("/ok", method="POST", payload="<a/>", calls_per_batch=2)
+        )
+        self.assertEqual([r.status_code for r in results], [201, 201])
+
+    def test_timeout(self):
+        config = self._config("/slow", calls_per_batch=1)
+        config.timeout = 0.2
+        (result,) = self.caller.call_batch(config)
+        self.assertEqual(result.status_code, -1)
+        self.assertEqual(result.error_message, "请求超时")
+
+    def test_discard(self):
+        self.caller.call_batch(self._config("/ok", calls_per_batch=1))
+        session = self.caller._sessions[1]
+
+        self.caller.discard(1)
+        # 事件循环按提交顺序执行，等待一个空协程即可确认discard已完成
+        self._run(asyncio.sleep(0))
+
+        self.assertNotIn(1, self.caller._sessions)
+        self.assertTrue(session.closed)
+
+    def test_close(self):
+        self.caller.call_batch(self._config("/ok", calls_per_batch=1))
+        session = self.caller._sessions[1]
+        thread = self.caller._thread
+        # 先停止测试服务器，再关闭调用器的事件循环
+        self._stop_server()
+
+        self.caller.close()
+
+        self.assertTrue(session.closed)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(self.loop.is_closed())
+        self.assertIsNone(self.caller._loop)
+
+
+if __name__ == "__main__":
+    unittest.main()
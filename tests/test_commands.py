@@ -0,0 +1,77 @@
+"""
+命令行命令的单元测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from webservice_monitor.cli.commands import _get_config_cached, _lookup_kwargs, cli
+from webservice_monitor.db import repository
+from webservice_monitor.db.models import Configuration
+from webservice_monitor.utils.config import get_setting, set_setting
+
+
+def _close_writer():
+    """关闭共享写连接，下次使用时按当前DB_PATH重新连接"""
+    with repository._writer_lock:
+        if repository._writer.conn is not None:
+            repository._writer.conn.close()
+            repository._writer.conn = None
+
+
+class TestLookupKwargs(unittest.TestCase):
+    def test_lookup_kwargs(self):
+        self.assertEqual(_lookup_kwargs("12"), {"config_id": 12})
+        self.assertEqual(_lookup_kwargs(" 1"), {"config_id": 1})
+        self.assertEqual(_lookup_kwargs("+1"), {"config_id": 1})
+        self.assertEqual(_lookup_kwargs("Test API"), {"name": "Test API"})
+        # ID从1开始，0和负数按名称查找
+        self.assertEqual(_lookup_kwargs("0"), {"name": "0"})
+        self.assertEqual(_lookup_kwargs("-3"), {"name": "-3"})
+
+
+class TestConfigCommands(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        old_db_path = get_setting("DB_PATH")
+        set_setting("DB_PATH", os.path.join(tmp_dir.name, "test.db"))
+        self.addCleanup(repository.reset_db_path_cache)
+        self.addCleanup(set_setting, "DB_PATH", old_db_path)
+        self.addCleanup(_close_writer)
+        repository.init_db()
+
+        _get_config_cached.cache_clear()
+        self.addCleanup(_get_config_cached.cache_clear)
+        self.runner = CliRunner()
+
+    def _invoke(self, *args):
+        result = self.runner.invoke(cli, list(args))
+        self.assertIsNone(result.exception, result.output)
+        return result.output
+
+    def test_zero_is_not_found(self):
+        for command in ("show", "enable", "disable", "delete"):
+            output = self._invoke("config", command, "0")
+            self.assertIn("未找到配置 '0'", output)
+
+    def test_numeric_looking_name(self):
+        repository.save_configuration(
+            Configuration(name="0", url="http://example.com/zero")
+        )
+
+        self.assertIn(
+            "URL: http://example.com/zero", self._invoke("config", "show", "0")
+        )
+        self.assertIn("已禁用配置 '0'", self._invoke("config", "disable", "0"))
+        self.assertFalse(repository.get_configuration(name="0").is_active)
+        # 正整数仍按ID查找
+        self.assertIn("名称: 0", self._invoke("config", "show", "1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+HTML报告生成的单元测试
+"""
+
+import os
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from webservice_monitor.db import repository
+from webservice_monitor.db.models import CallDetail, Configuration, MinuteStats
+from webservice_monitor.reports.html_generator import HTMLReportGenerator
+from webservice_monitor.utils.config import SETTINGS, get_setting, set_setting
+
+
+def _close_writer():
+    """关闭共享写连接，下次使用时按当前DB_PATH重新连接"""
+    with repository._writer_lock:
+        if repository._writer.conn is not None:
+            repository._writer.conn.close()
+            repository._writer.conn = None
+
+
+def _minute_stats(start: datetime.datetime, count: int, config_id: int):
+    return [
+        MinuteStats(
+            start_time=(start + datetime.timedelta(minutes=i)).isoformat(),
+            end_time=(start + datetime.timedelta(minutes=i + 1)).isoformat(),
+            avg_response_time=0.5,
+            max_response_time=1.0,
+            min_response_time=0.1,
+            call_count=5,
+            success_count=5,
+            config_id=config_id,
+        )
+        for i in range(count)
+    ]
+
+
+class TestChartCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        old_db_path = get_setting("DB_PATH")
+        set_setting("DB_PATH", os.path.join(tmp_dir.name, "test.db"))
+        self.addCleanup(repository.reset_db_path_cache)
+        self.addCleanup(set_setting, "DB_PATH", old_db_path)
+        self.addCleanup(_close_writer)
+        repository.init_db()
+
+        report_dir_patcher = patch.object(
+            SETTINGS, "REPORT_DIR", os.path.join(tmp_dir.name, "reports")
+        )
+        report_dir_patcher.start()
+        self.addCleanup(report_dir_patcher.stop)
+
+        self.date = datetime.date(2024, 1, 10)
+        self.config_id, _ = repository.save_configuration(
+            Configuration(name="Test API", url="http://example.com/test")
+        )
+        repository.save_minute_stats_bulk(
+            _minute_stats(
+                datetime.datetime(2024, 1, 10, 9),
+                SETTINGS.CHART_MIN_POINTS,
+                self.config_id,
+            )
+        )
+        self.generator = HTMLReportGenerator()
+
+    def _charts(self):
+        data = self.generator._prepare_report_data(self.date)
+        return self.generator._generate_charts(data, self.date)
+
+    @patch.object(HTMLReportGenerator, "_render_charts", return_value={})
+    def test_cache_hit_and_miss(self, mock_render):
+        self._charts()
+        self._charts()
+        # 数据未变化时复用缓存
+        self.assertEqual(mock_render.call_count, 1)
+
+        # 当天统计不变，但每日对比图读取的前几天数据变化
+        repository.save_minute_stats_bulk(
+            _minute_stats(datetime.datetime(2024, 1, 8, 9), 1, self.config_id)
+        )
+        self._charts()
+        self.assertEqual(mock_render.call_count, 2)
+
+        # 状态码分布图读取的当天调用详情变化
+        repository.save_call_details(
+            [
+                CallDetail(
+                    timestamp=repository.day_range_ms(self.date)[0] + 1000,
+                    status_code=500,
+                    config_id=self.config_id,
+                )
+            ]
+        )
+        self._charts()
+        self.assertEqual(mock_render.call_count, 3)
+        self._charts()
+        self.assertEqual(mock_render.call_count, 3)
+
+    @patch.object(HTMLReportGenerator, "_render_charts", return_value={})
+    def test_stale_temp_dirs_removed(self, mock_render):
+        charts_root = os.path.join(SETTINGS.REPORT_DIR, "charts")
+        os.makedirs(charts_root)
+        stale = tempfile.mkdtemp(prefix=".response_time_20240110-0.", dir=charts_root)
+        recent = tempfile.mkdtemp(prefix=".response_time_20240110-1.", dir=charts_root)
+        os.utime(stale, (0, 0))
+
+        self._charts()
+
+        self.assertFalse(os.path.exists(stale))
+        # 未超时的临时目录可能属于仍在进行的生成
+        self.assertTrue(os.path.exists(recent))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,11 @@ from webservice_monitor.db.models import Configuration, CallDetail
 
 class TestWebServiceMonitor(unittest.TestCase):
     def setUp(self):
+        # 屏蔽真实的sleep，避免测试被等待拖慢
+        sleep_patcher = patch("webservice_monitor.core.monitor.time.sleep")
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
         self.monitor = WebServiceMonitor()
         self.test_config = Configuration(
             id=1,
@@ -22,21 +27,59 @@ class TestWebServiceMonitor(unittest.TestCase):
             alert_threshold=2.0,
         )
 
-    @patch("webservice_monitor.core.monitor.WebServiceCaller.call")
-    def test_call_webservice(self, mock_call):
+    @patch("webservice_monitor.core.monitor.repository")
+    @patch.object(WebServiceMonitor, "_session_for")
+    def test_call_webservice(self, mock_session_for, mock_repository):
         # 设置模拟返回值
-        mock_call_detail = CallDetail(status_code=200, response_time=0.5, config_id=1)
-        mock_call.return_value = mock_call_detail
+        mock_session = mock_session_for.return_value
+        mock_session.get.return_value.status_code = 200
 
         # 调用被测方法
         result = self.monitor.call_webservice(self.test_config)
 
         # 验证结果
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.response_time, 0.5)
+        self.assertEqual(result.config_id, 1)
+        self.assertGreaterEqual(result.response_time, 0)
 
         # 验证调用
-        mock_call.assert_called_once_with(self.test_config)
+        mock_session_for.assert_called_once_with(self.test_config)
+        mock_session.get.assert_called_once_with(
+            "http://example.com/test",
+            headers=self.test_config.effective_headers,
+            timeout=10,
+        )
+        mock_repository.enqueue_call_details.assert_called_once()
+
+    @patch("webservice_monitor.core.monitor.repository")
+    @patch.object(WebServiceMonitor, "_session_for")
+    def test_call_webservice_error(self, mock_session_for, mock_repository):
+        mock_session_for.return_value.get.side_effect = ConnectionError("refused")
+
+        result = self.monitor.call_webservice(self.test_config)
+
+        self.assertEqual(result.status_code, -1)
+        self.assertEqual(result.error_message, "refused")
+
+    @patch("webservice_monitor.core.monitor.repository")
+    def test_batch_call_uses_async_caller(self, mock_repository):
+        self.monitor._async_caller = MagicMock()
+        self.monitor._async_caller.call_batch.return_value = [
+            CallDetail(status_code=200, response_time=0.5, config_id=1)
+        ]
+
+        results = self.monitor.batch_call_webservice(self.test_config)
+
+        self.assertEqual([r.status_code for r in results], [200])
+        self.monitor._async_caller.call_batch.assert_called_once_with(self.test_config)
+
+    @patch("webservice_monitor.core.monitor.repository")
+    def test_stop_closes_async_caller(self, mock_repository):
+        self.monitor._async_caller = MagicMock()
+        self.monitor._stop_event.clear()
+
+        self.assertTrue(self.monitor.stop())
+        self.monitor._async_caller.close.assert_called_once_with()
 
     def test_is_in_monitoring_hours(self):
         # 测试全天监控
@@ -73,6 +116,109 @@ class TestWebServiceMonitor(unittest.TestCase):
             mock_now.hour = 12
             self.assertFalse(self.monitor._is_in_monitoring_hours(self.test_config))
 
+    def test_configs_snapshot_cached_until_configs_change(self):
+        self.monitor.configurations = {1: self.test_config}
+        self.monitor._configs_dirty = True
+
+        snapshot = self.monitor.get_configs_snapshot()
+        self.assertEqual(snapshot, [{"id": 1, "name": "Test API"}])
+        # 配置未变化时返回同一个缓存对象
+        self.assertIs(self.monitor.get_configs_snapshot(), snapshot)
+
+        with patch(
+            "webservice_monitor.core.monitor.repository.get_all_configurations"
+        ) as mock_get_all:
+            mock_get_all.return_value = []
+            self.monitor.load_configurations()
+
+        self.assertEqual(self.monitor.get_configs_snapshot(), [])
+
+    @patch("webservice_monitor.core.monitor.repository")
+    def test_minute_stats_from_accumulated_calls(self, mock_repository):
+        self.monitor.configurations = {1: self.test_config}
+        self.monitor._record_call_details(
+            self.test_config,
+            [
+                CallDetail(status_code=code, response_time=rt, config_id=1)
+                for code, rt in [(200, 0.5), (500, 1.5), (200, 1.0)]
+            ],
+        )
+
+        self.monitor.calculate_minute_stats()
+
+        (stats,) = mock_repository.save_minute_stats_bulk.call_args[0][0]
+        self.assertEqual(stats.call_count, 3)
+        self.assertEqual(stats.success_count, 2)
+        self.assertAlmostEqual(stats.avg_response_time, 1.0)
+        self.assertEqual(stats.min_response_time, 0.5)
+        self.assertEqual(stats.max_response_time, 1.5)
+
+        # 累加器已重置，下一分钟没有调用时不保存统计
+        mock_repository.save_minute_stats_bulk.reset_mock()
+        self.monitor.calculate_minute_stats()
+        mock_repository.save_minute_stats_bulk.assert_not_called()
+
+    def test_apply_config_delta(self):
+        other = Configuration(id=2, name="Other API", url="http://example.com/other")
+        self.monitor.configurations = {1: self.test_config, 2: other}
+
+        changed_config = Configuration(
+            id=1,
+            name="Test API",
+            url="http://example.com/test",
+            call_interval=10,
+            created_at=self.test_config.created_at,
+        )
+        added_config = Configuration(id=3, name="New API", url="http://example.com/new")
+        added, removed, changed = self.monitor.apply_config_delta(
+            {1: changed_config, 3: added_config}
+        )
+
+        self.assertEqual(added, {3})
+        self.assertEqual(removed, {2})
+        self.assertEqual(changed, {1})
+        self.assertIs(self.monitor.configurations[1], changed_config)
+        self.assertNotIn(2, self.monitor.configurations)
+
+    def test_apply_config_delta_rebuilds_resized_sessions(self):
+        other = Configuration(id=2, name="Other API", url="http://example.com/other")
+        self.monitor.configurations = {1: self.test_config, 2: other}
+        self.monitor._async_caller = MagicMock()
+        resized_session = self.monitor._session_for(self.test_config)
+        other_session = self.monitor._session_for(other)
+
+        # 配置1的每批调用次数变化，配置2只有调用间隔变化
+        resized_config = Configuration(
+            id=1,
+            name="Test API",
+            url="http://example.com/test",
+            calls_per_batch=20,
+            created_at=self.test_config.created_at,
+        )
+        interval_config = Configuration(
+            id=2,
+            name="Other API",
+            url="http://example.com/other",
+            call_interval=10,
+            created_at=other.created_at,
+        )
+        _, _, changed = self.monitor.apply_config_delta(
+            {1: resized_config, 2: interval_config}
+        )
+
+        self.assertEqual(changed, {1, 2})
+        # 只有调用次数变化的配置重建会话，连接池按新的调用次数创建
+        self.monitor._async_caller.discard.assert_called_once_with(1)
+        new_session = self.monitor._session_for(resized_config)
+        self.assertIsNot(new_session, resized_session)
+        self.assertEqual(
+            new_session.get_adapter("http://").poolmanager.connection_pool_kw[
+                "maxsize"
+            ],
+            20,
+        )
+        self.assertIs(self.monitor._session_for(interval_config), other_session)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,126 @@
+"""
+数据库操作的单元测试
+"""
+
+import os
+import time
+import sqlite3
+import datetime
+import tempfile
+import unittest
+
+from webservice_monitor.db import repository
+from webservice_monitor.utils.config import get_setting, set_setting
+
+# 旧版本创建的call_details表及索引，timestamp保存ISO文本
+_OLD_CALL_DETAILS = """
+CREATE TABLE call_details (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    response_time REAL,
+    status_code INTEGER,
+    error_message TEXT,
+    config_id INTEGER,
+    FOREIGN KEY(config_id) REFERENCES configurations(id)
+);
+CREATE INDEX idx_call_details_timestamp ON call_details(timestamp);
+CREATE INDEX idx_call_details_config_id ON call_details(config_id);
+"""
+
+
+def _close_writer():
+    """关闭共享写连接，下次使用时按当前DB_PATH重新连接"""
+    with repository._writer_lock:
+        if repository._writer.conn is not None:
+            repository._writer.conn.close()
+            repository._writer.conn = None
+
+
+@unittest.skipUnless(hasattr(time, "tzset"), "需要time.tzset切换时区")
+class TestCallDetailsMigration(unittest.TestCase):
+    def setUp(self):
+        # 迁移按本地时区解释旧时间，固定为UTC使结果确定
+        old_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "UTC"
+        time.tzset()
+
+        def restore_tz():
+            if old_tz is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = old_tz
+            time.tzset()
+
+        self.addCleanup(restore_tz)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db_path = os.path.join(tmp_dir.name, "old.db")
+
+        old_db_path = get_setting("DB_PATH")
+        set_setting("DB_PATH", self.db_path)
+        repository.reset_db_path_cache()
+        self.addCleanup(repository.reset_db_path_cache)
+        self.addCleanup(set_setting, "DB_PATH", old_db_path)
+        self.addCleanup(_close_writer)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(_OLD_CALL_DETAILS)
+        conn.executemany(
+            "INSERT INTO call_details "
+            "(timestamp, response_time, status_code, error_message, config_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                ("2024-01-02T03:04:05.678000", 0.5, 200, None, 1),
+                ("2024-01-02T23:59:59", 1.5, 500, "error", 2),
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+    def _rows(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, timestamp, typeof(timestamp), status_code "
+                "FROM call_details ORDER BY id"
+            ).fetchall()
+            indexes = {
+                row[1] for row in conn.execute("PRAGMA index_list(call_details)")
+            }
+            column_type = {
+                row[1]: row[2]
+                for row in conn.execute("PRAGMA table_info(call_details)")
+            }["timestamp"]
+        finally:
+            conn.close()
+        return rows, indexes, column_type
+
+    def test_init_db_converts_iso_timestamps_to_epoch_ms(self):
+        repository.init_db()
+        rows, indexes, column_type = self._rows()
+
+        utc = datetime.timezone.utc
+        expected = [
+            datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=utc),
+            datetime.datetime(2024, 1, 2, 23, 59, 59, tzinfo=utc),
+        ]
+        self.assertEqual(column_type, "INTEGER")
+        self.assertEqual(
+            rows,
+            [
+                (1, round(expected[0].timestamp() * 1000), "integer", 200),
+                (2, round(expected[1].timestamp() * 1000), "integer", 500),
+            ],
+        )
+        self.assertIn("idx_call_details_timestamp", indexes)
+        self.assertIn("idx_call_details_cfg_ts", indexes)
+        self.assertNotIn("idx_call_details_config_id", indexes)
+
+        # 再次初始化不重复转换
+        repository.init_db()
+        self.assertEqual(self._rows(), (rows, indexes, column_type))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,6 @@ WebService监控工具主入口点
 import sys
 import logging
 
-from webservice_monitor.cli.commands import cli
 from webservice_monitor.utils.logger import setup_logger
 
 
@@ -18,6 +17,9 @@ def main():
     setup_logger()
 
     try:
+        # 延迟导入命令行模块，避免启动时加载不需要的依赖
+        from webservice_monitor.cli.commands import cli
+
         # 启动命令行界面
         cli()
     except KeyboardInterrupt:
@@ -10,27 +10,110 @@ import logging
 import datetime
 import signal
 import time
-from tabulate import tabulate
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Any
-import psutil  # 需要添加到依赖中
 
 from webservice_monitor.db import repository
 from webservice_monitor.db.models import Configuration
-from webservice_monitor.core.scheduler import MonitorScheduler
 from webservice_monitor.core.caller import WebServiceCaller
-from webservice_monitor.reports.html_generator import HTMLReportGenerator
-from webservice_monitor.reports.pdf_generator import PDFReportGenerator
 from webservice_monitor.utils.config import get_setting, load_config
+from webservice_monitor.utils import serialization
 from webservice_monitor.cli.formatters import format_config, format_alert
 
 logger = logging.getLogger(__name__)
 
+# 监控进程的状态目录及文件
+_STATE_DIR = Path.home() / ".webservice_monitor"
+_PID_FILE = _STATE_DIR / "monitor.pid"
+_STATUS_FILE = _STATE_DIR / "monitor_status.json"
+_LOG_FILE = _STATE_DIR / "monitor.log"
+
+# 多个命令共用的选项类型
+_METHOD_CHOICE = click.Choice(["GET", "POST"])
+_FORMAT_CHOICE = click.Choice(["html", "pdf"])
+
+
+@lru_cache(maxsize=256)
+def _get_config_cached(
+    config_id: Optional[int] = None, name: Optional[str] = None
+) -> Optional[Configuration]:
+    """获取配置，单次命令调用内缓存查询结果"""
+    return repository.get_configuration(config_id=config_id, name=name)
+
+
+def _lookup_kwargs(id_or_name: str) -> Dict[str, Any]:
+    """将ID或名称参数转换为仓储查询参数，能转换为正整数的视为ID
+
+    ID从1开始，0和负数按名称查找(仓储函数会把config_id=0视为未提供)
+    """
+    try:
+        config_id = int(id_or_name)
+    except ValueError:
+        return {"name": id_or_name}
+    if config_id > 0:
+        return {"config_id": config_id}
+    return {"name": id_or_name}
+
+
+def _resolve_config(id_or_name: str) -> Optional[Configuration]:
+    """按ID或名称查找配置"""
+    return _get_config_cached(**_lookup_kwargs(id_or_name))
+
+
+@lru_cache(maxsize=None)
+def _find_run_script() -> Optional[str]:
+    """查找run_monitor.py脚本路径，找不到时返回None"""
+    package_dir = os.path.dirname(os.path.dirname(__file__))
+    for base_dir in (package_dir, os.path.dirname(package_dir)):
+        script_path = os.path.join(base_dir, "scripts", "run_monitor.py")
+        if os.path.exists(script_path):
+            return script_path
+    return None
+
+
+def _spawn_background(cmd: List[str], log_path: Path):
+    """在后台启动进程，输出追加到日志文件，返回(进程, 启动前日志偏移量)"""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "ab", buffering=0) as log:
+        offset = log.tell()
+        popen_kwargs = {"stdout": log, "stderr": subprocess.STDOUT}
+        if os.name == "nt":  # Windows
+            popen_kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        else:  # Unix/Linux
+            popen_kwargs["start_new_session"] = True
+        process = subprocess.Popen(cmd, **popen_kwargs)
+
+    return process, offset
+
+
+def _read_log_since(log_path: Path, offset: int, max_bytes: int = 4096) -> str:
+    """读取日志文件自offset起新增的内容，最多返回末尾max_bytes字节"""
+    try:
+        with open(log_path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(max(offset, end - max_bytes))
+            return f.read().decode("utf-8", errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def _write_pid_file(pid: int):
+    """原子地写入PID文件，读取方只会看到完整的旧值或新值"""
+    _STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _PID_FILE.with_suffix(".pid.tmp")
+    tmp.write_text(str(pid))
+    os.replace(tmp, _PID_FILE)
+
 
 @click.group()
 @click.version_option()
 def cli():
     """WebService监控工具 - 监控多个Web服务接口的性能和可用性"""
-    pass
+    # 建表及旧数据库的结构迁移，均为幂等操作
+    repository.init_db()
 
 
 @cli.group()
@@ -42,9 +125,7 @@ def config():
 @config.command("add")
 @click.option("--name", "-n", required=True, help="配置名称")
 @click.option("--url", "-u", required=True, help="接口URL")
-@click.option(
-    "--method", "-m", default="GET", type=click.Choice(["GET", "POST"]), help="请求方法"
-)
+@click.option("--method", "-m", default="GET", type=_METHOD_CHOICE, help="请求方法")
 @click.option("--headers", "-h", help="请求头 (JSON格式)")
 @click.option("--payload", "-p", help="请求正文 (POST方法)")
 @click.option("--interval", "-i", default=5, type=int, help="调用间隔 (秒)")
@@ -107,6 +188,7 @@ def add_config(
     # 保存配置
     try:
         config_id, action = repository.save_configuration(config)
+        _get_config_cached.cache_clear()
         click.echo(f"已{action}配置 '{name}' (ID: {config_id})")
     except Exception as e:
         click.echo(f"错误: {str(e)}")
@@ -117,6 +199,8 @@ def add_config(
 @click.option("--verbose", "-v", is_flag=True, help="显示详细信息")
 def list_configs(active, verbose):
     """列出所有配置"""
+    from tabulate import tabulate
+
     configs = repository.get_all_configurations(active_only=active)
 
     if not configs:
@@ -124,34 +208,31 @@ def list_configs(active, verbose):
         return
 
     if verbose:
-        click.echo(
-            "\n"
-            + tabulate(
-                [format_config(config, verbose=True) for config in configs],
-                headers=[
-                    "ID",
-                    "名称",
-                    "URL",
-                    "方法",
-                    "间隔",
-                    "批量",
-                    "超时",
-                    "告警阈值",
-                    "时段",
-                    "状态",
-                ],
-                tablefmt="grid",
-            )
-        )
+        headers = [
+            "ID",
+            "名称",
+            "URL",
+            "方法",
+            "间隔",
+            "批量",
+            "超时",
+            "告警阈值",
+            "时段",
+            "状态",
+        ]
+        tablefmt = "grid"
     else:
-        click.echo(
-            "\n"
-            + tabulate(
-                [format_config(config) for config in configs],
-                headers=["ID", "名称", "URL", "状态"],
-                tablefmt="simple",
-            )
+        headers = ["ID", "名称", "URL", "状态"]
+        tablefmt = "simple"
+
+    click.echo(
+        "\n"
+        + tabulate(
+            (format_config(config, verbose=verbose) for config in configs),
+            headers=headers,
+            tablefmt=tablefmt,
         )
+    )
 
     click.echo(f"\n共 {len(configs)} 个配置")
 
@@ -160,51 +241,46 @@ def list_configs(active, verbose):
 @click.argument("id_or_name")
 def show_config(id_or_name):
     """显示配置详情"""
-    config = None
-
-    # 尝试按ID查找
-    try:
-        config_id = int(id_or_name)
-        config = repository.get_configuration(config_id=config_id)
-    except ValueError:
-        # 按名称查找
-        config = repository.get_configuration(name=id_or_name)
+    config = _resolve_config(id_or_name)
 
     if not config:
         click.echo(f"错误: 未找到配置 '{id_or_name}'")
         return
 
-    click.echo("\n配置详情:")
-    click.echo(f"ID: {config.id}")
-    click.echo(f"名称: {config.name}")
-    click.echo(f"URL: {config.url}")
-    click.echo(f"方法: {config.method}")
-    click.echo(f"请求头: {json.dumps(config.headers, indent=2, ensure_ascii=False)}")
+    # 先拼接全部行再一次性输出，避免逐行写入
+    lines = [
+        "\n配置详情:",
+        f"ID: {config.id}",
+        f"名称: {config.name}",
+        f"URL: {config.url}",
+        f"方法: {config.method}",
+        f"请求头: {config.headers_pretty}",
+    ]
 
     if config.payload:
-        click.echo(f"请求正文: {config.payload}")
-
-    click.echo(f"调用间隔: {config.call_interval}秒")
-    click.echo(f"每批调用次数: {config.calls_per_batch}")
-    click.echo(f"超时时间: {config.timeout}秒")
-    click.echo(f"告警阈值: {config.alert_threshold}秒")
-    click.echo(f"监控时段: {config.monitoring_hours}")
-    click.echo(f"活跃状态: {'是' if config.is_active else '否'}")
-    click.echo(f"创建时间: {config.created_at}")
-    click.echo(f"更新时间: {config.updated_at}")
+        lines.append(f"请求正文: {config.payload}")
+
+    lines.extend(
+        [
+            f"调用间隔: {config.call_interval}秒",
+            f"每批调用次数: {config.calls_per_batch}",
+            f"超时时间: {config.timeout}秒",
+            f"告警阈值: {config.alert_threshold}秒",
+            f"监控时段: {config.monitoring_hours}",
+            f"活跃状态: {'是' if config.is_active else '否'}",
+            f"创建时间: {config.created_at}",
+            f"更新时间: {config.updated_at}",
+        ]
+    )
+    click.echo("\n".join(lines))
 
 
 @config.command("enable")
 @click.argument("id_or_name")
 def enable_config(id_or_name):
     """启用配置"""
-    success = False
-
-    try:
-        config_id = int(id_or_name)
-        success = repository.toggle_configuration(config_id=config_id, active=True)
-    except ValueError:
-        success = repository.toggle_configuration(name=id_or_name, active=True)
+    success = repository.toggle_configuration(**_lookup_kwargs(id_or_name), active=True)
+    _get_config_cached.cache_clear()
 
     if success:
         click.echo(f"已启用配置 '{id_or_name}'")
@@ -216,13 +292,10 @@ def enable_config(id_or_name):
 @click.argument("id_or_name")
 def disable_config(id_or_name):
     """禁用配置"""
-    success = False
-
-    try:
-        config_id = int(id_or_name)
-        success = repository.toggle_configuration(config_id=config_id, active=False)
-    except ValueError:
-        success = repository.toggle_configuration(name=id_or_name, active=False)
+    success = repository.toggle_configuration(
+        **_lookup_kwargs(id_or_name), active=False
+    )
+    _get_config_cached.cache_clear()
 
     if success:
         click.echo(f"已禁用配置 '{id_or_name}'")
@@ -235,15 +308,7 @@ def disable_config(id_or_name):
 @click.option("--force", "-f", is_flag=True, help="强制删除，不提示确认")
 def delete_config(id_or_name, force):
     """删除配置"""
-    config = None
-
-    # 尝试按ID查找
-    try:
-        config_id = int(id_or_name)
-        config = repository.get_configuration(config_id=config_id)
-    except ValueError:
-        # 按名称查找
-        config = repository.get_configuration(name=id_or_name)
+    config = _resolve_config(id_or_name)
 
     if not config:
         click.echo(f"错误: 未找到配置 '{id_or_name}'")
@@ -258,6 +323,7 @@ def delete_config(id_or_name, force):
         success = repository.delete_configuration(config_id=config.id)
     else:
         success = repository.delete_configuration(name=config.name)
+    _get_config_cached.cache_clear()
 
     if success:
         click.echo(f"已删除配置 '{config.name}'")
@@ -271,8 +337,8 @@ def delete_config(id_or_name, force):
 def import_config(json_file, test):
     """从JSON文件导入配置"""
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(json_file, "rb") as f:
+            data = serialization.loads(f.read())
     except Exception as e:
         click.echo(f"错误: 无法读取JSON文件: {str(e)}")
         return
@@ -315,6 +381,7 @@ def import_config(json_file, test):
                 config.headers,
                 config.payload,
                 config.timeout,
+                session=WebServiceCaller.session_for(config.url),
             )
 
             click.echo(f"测试结果: {message}")
@@ -329,6 +396,7 @@ def import_config(json_file, test):
         # 保存配置
         try:
             config_id, action = repository.save_configuration(config)
+            _get_config_cached.cache_clear()
             click.echo(f"已{action}配置 '{name}' (ID: {config_id})")
             success_count += 1
         except Exception as e:
@@ -345,12 +413,8 @@ def export_config(output_file, ids, active_only):
     """导出配置到JSON文件"""
     if ids:
         try:
-            id_list = [int(x.strip()) for x in ids.split(",")]
-            configs = []
-            for config_id in id_list:
-                config = repository.get_configuration(config_id=config_id)
-                if config:
-                    configs.append(config)
+            id_list = list(map(int, ids.replace(" ", "").split(",")))
+            configs = repository.get_configurations_by_ids(id_list)
         except ValueError:
             click.echo("错误: 配置ID必须是整数")
             return
@@ -387,8 +451,8 @@ def export_config(output_file, ids, active_only):
 
     # 写入文件
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        with open(output_file, "wb") as f:
+            f.write(serialization.dumps(export_data, indent=True))
 
         click.echo(f"已导出 {len(configs)} 个配置到 {output_file}")
     except Exception as e:
@@ -401,33 +465,20 @@ def export_config(output_file, ids, active_only):
 @click.option("--config-file", help="使用指定的配置文件")
 def start_monitoring(config, foreground, config_file):
     """启动监控"""
-    import subprocess
-    import os
-    import sys
 
     # 处理配置ID
     config_ids = None
     if config:
         try:
-            config_ids = [int(x.strip()) for x in config.split(",")]
+            config_ids = list(map(int, config.replace(" ", "").split(",")))
         except ValueError:
             click.echo("错误: 配置ID必须是整数")
             return
 
     # 脚本路径
-    script_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), "scripts", "run_monitor.py"
-    )
-
-    if not os.path.exists(script_path):
-        script_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "scripts",
-            "run_monitor.py",
-        )
-
-    if not os.path.exists(script_path):
-        click.echo(f"错误: 未找到运行脚本 {script_path}")
+    script_path = _find_run_script()
+    if not script_path:
+        click.echo("错误: 未找到运行脚本 run_monitor.py")
         return
 
     # 构建命令参数
@@ -453,74 +504,44 @@ def start_monitoring(config, foreground, config_file):
             process.wait(timeout=10)
             click.echo("监控已停止")
     else:
-        # 后台运行
-        if os.name == "nt":  # Windows
-            try:
-                from subprocess import CREATE_NO_WINDOW
-
-                process = subprocess.Popen(
-                    cmd,
-                    creationflags=CREATE_NO_WINDOW,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-            except AttributeError:
-                # 如果CREATE_NO_WINDOW不可用，使用标准方式
-                process = subprocess.Popen(
-                    cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-        else:  # Unix/Linux
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True,
-            )
+        # 后台运行，输出写入日志文件，避免无人读取的管道写满后阻塞子进程
+        process, log_offset = _spawn_background(cmd, _LOG_FILE)
 
         # 等待短暂时间，检查进程是否立即失败
-        import time
 
         time.sleep(1)
 
         if process.poll() is not None:
             click.echo(f"错误: 监控进程启动失败 (退出码: {process.returncode})")
-            stdout, stderr = process.communicate()
-            if stdout:
-                click.echo(f"输出: {stdout.decode('utf-8', errors='replace').strip()}")
-            if stderr:
-                click.echo(f"错误: {stderr.decode('utf-8', errors='replace').strip()}")
+            output = _read_log_since(_LOG_FILE, log_offset)
+            if output:
+                click.echo(f"输出: {output}")
         else:
             click.echo(f"监控已在后台启动 (PID: {process.pid})")
 
             # 写入PID用于后续停止
-            pid_dir = os.path.join(os.path.expanduser("~"), ".webservice_monitor")
-            os.makedirs(pid_dir, exist_ok=True)
-
-            pid_file = os.path.join(pid_dir, "monitor.pid")
-            with open(pid_file, "w") as f:
-                f.write(str(process.pid))
+            _write_pid_file(process.pid)
 
 
 @cli.command("stop")
 def stop_monitoring():
     """停止监控"""
-    import os
-    import signal
-
-    pid_file = os.path.join(
-        os.path.expanduser("~"), ".webservice_monitor", "monitor.pid"
-    )
+    import psutil
 
-    if not os.path.exists(pid_file):
+    if not _PID_FILE.exists():
         click.echo("未找到运行中的监控进程")
         return
 
     try:
-        with open(pid_file, "r") as f:
-            pid = int(f.read().strip())
+        pid = int(_PID_FILE.read_text().strip())
 
         click.echo(f"正在停止监控进程 (PID: {pid})...")
 
+        try:
+            process = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            process = None
+
         # 发送终止信号
         if os.name == "nt":  # Windows
             import ctypes
@@ -532,130 +553,124 @@ def stop_monitoring():
         else:  # Unix/Linux
             os.kill(pid, signal.SIGTERM)
 
-        # 等待进程退出
-        import time
-
-        for _ in range(10):
-            try:
-                if os.name == "nt":  # Windows
-                    import subprocess
-
-                    subprocess.check_call(
-                        f"taskkill /F /PID {pid}",
-                        stderr=subprocess.DEVNULL,
-                        stdout=subprocess.DEVNULL,
-                    )
-                else:
-                    os.kill(pid, 0)
-                time.sleep(1)
-            except (subprocess.CalledProcessError, ProcessLookupError, OSError):
-                # 进程已终止
-                break
-        else:
-            click.echo("警告: 进程未能在10秒内退出")
+        # 等待进程退出，进程结束时立即返回
+        if process:
+            gone, alive = psutil.wait_procs([process], timeout=10)
+            if alive:
+                click.echo("警告: 进程未能在10秒内退出，尝试强制终止...")
+                try:
+                    process.kill()
+                    psutil.wait_procs([process], timeout=3)
+                except psutil.NoSuchProcess:
+                    pass
 
         # 删除PID文件
-        os.remove(pid_file)
+        _PID_FILE.unlink()
         click.echo("监控已停止")
 
     except Exception as e:
         click.echo(f"停止监控时出错: {str(e)}")
         # 尝试清理PID文件
-        if os.path.exists(pid_file):
-            os.remove(pid_file)
+        if _PID_FILE.exists():
+            _PID_FILE.unlink()
 
 
 @cli.command("status")
-def check_status():
+@click.option("--cpu", is_flag=True, help="采样CPU使用率 (需额外等待0.1秒)")
+def check_status(cpu):
     """检查监控状态"""
-    import os
-    import json
     import psutil
-    from datetime import datetime
-
-    pid_file = os.path.join(
-        os.path.expanduser("~"), ".webservice_monitor", "monitor.pid"
-    )
-    status_file = os.path.join(
-        os.path.expanduser("~"), ".webservice_monitor", "monitor_status.json"
-    )
 
     # 首先检查状态文件
     status_data = None
-    if os.path.exists(status_file):
+    if _STATUS_FILE.exists():
         try:
-            with open(status_file, "r") as f:
-                status_data = json.load(f)
+            status_data = serialization.loads(_STATUS_FILE.read_bytes())
 
             # 检查状态文件是否过期（超过2分钟未更新）
-            if "last_update" in status_data:
-                last_update = datetime.fromisoformat(status_data["last_update"])
-                if (datetime.now() - last_update).total_seconds() > 120:
-                    click.echo("警告: 状态信息可能已过期")
+            # 监控进程在状态未变化时只刷新文件修改时间，因此以mtime为准
+            if time.time() - _STATUS_FILE.stat().st_mtime > 120:
+                click.echo("警告: 状态信息可能已过期")
         except Exception as e:
             click.echo(f"警告: 无法读取状态文件: {str(e)}")
 
     # 其次检查PID文件
-    if not os.path.exists(pid_file):
+    if not _PID_FILE.exists():
         click.echo("监控未运行")
         return
 
     try:
-        with open(pid_file, "r") as f:
-            pid = int(f.read().strip())
+        pid = int(_PID_FILE.read_text().strip())
 
         # 检查进程是否存在
-        if psutil.pid_exists(pid):
-            process = None
-            try:
-                process = psutil.Process(pid)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        try:
+            process = psutil.Process(pid)
+            process_exists = True
+        except psutil.NoSuchProcess:
+            process, process_exists = None, False
+        except psutil.AccessDenied:
+            process, process_exists = None, True
+
+        if process_exists:
 
-            # 显示状态信息
-            click.echo(f"监控正在运行 (PID: {pid})")
+            # 显示状态信息，收集所有行后一次性输出
+            lines = [f"监控正在运行 (PID: {pid})"]
 
             # 如果有状态数据，显示更多信息
             if status_data and status_data.get("running", False):
-                if "start_time" in status_data:
-                    start_time = datetime.fromisoformat(status_data["start_time"])
-                    runtime = datetime.now() - start_time
-                    days, seconds = runtime.days, runtime.seconds
+                # 优先使用纪元秒计算运行时间，旧版状态文件只有ISO字符串
+                elapsed = None
+                if "start_ts" in status_data:
+                    elapsed = int(time.time() - status_data["start_ts"])
+                elif "start_time" in status_data:
+                    start_time = datetime.datetime.fromisoformat(
+                        status_data["start_time"]
+                    )
+                    elapsed = int(
+                        (datetime.datetime.now() - start_time).total_seconds()
+                    )
+
+                if elapsed is not None:
+                    days, seconds = divmod(elapsed, 86400)
                     hours, remainder = divmod(seconds, 3600)
                     minutes, seconds = divmod(remainder, 60)
-                    click.echo(
+                    lines.append(
                         f"运行时间: {days}天 {hours}小时 {minutes}分钟 {seconds}秒"
                     )
 
                 if "configs_count" in status_data:
-                    click.echo(f"监控配置数: {status_data['configs_count']}")
+                    lines.append(f"监控配置数: {status_data['configs_count']}")
 
                 if "configs" in status_data and status_data["configs"]:
-                    click.echo("\n监控的配置:")
-                    for cfg in status_data["configs"]:
-                        click.echo(f"  - ID: {cfg['id']}, 名称: {cfg['name']}")
+                    lines.append("\n监控的配置:")
+                    lines.extend(
+                        f"  - ID: {cfg['id']}, 名称: {cfg['name']}"
+                        for cfg in status_data["configs"]
+                    )
 
             # 如果有进程信息，显示资源使用情况
             if process:
                 try:
-                    # 获取CPU和内存使用情况
-                    cpu_percent = process.cpu_percent(interval=0.1)
-                    memory_info = process.memory_info()
-                    memory_mb = memory_info.rss / (1024 * 1024)
-
-                    click.echo(f"\n资源使用:")
-                    click.echo(f"  CPU使用率: {cpu_percent:.1f}%")
-                    click.echo(f"  内存使用: {memory_mb:.2f} MB")
+                    # 获取内存使用情况，CPU使用率需要两次采样，仅在指定--cpu时获取
+                    memory_mb = process.memory_info().rss / (1024 * 1024)
+                    cpu_percent = process.cpu_percent(interval=0.1) if cpu else None
+
+                    lines.append("\n资源使用:")
+                    if cpu_percent is not None:
+                        lines.append(f"  CPU使用率: {cpu_percent:.1f}%")
+                    lines.append(f"  内存使用: {memory_mb:.2f} MB")
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    click.echo("\n无法获取资源使用情况")
+                    lines.append("\n无法获取资源使用情况")
+
+            click.echo("\n".join(lines))
 
         else:
             click.echo("监控可能已异常终止")
             # 清理过时的PID文件
-            os.remove(pid_file)
+            _PID_FILE.unlink()
             # 也清理状态文件
-            if os.path.exists(status_file):
-                os.remove(status_file)
+            if _STATUS_FILE.exists():
+                _STATUS_FILE.unlink()
 
     except Exception as e:
         click.echo(f"检查状态时出错: {str(e)}")
@@ -665,37 +680,27 @@ def check_status():
 @cli.command("reload")
 def reload_configurations():
     """重新加载配置"""
-    import os
-    import time
-    import signal
-    import subprocess
-    import sys
     import psutil
 
-    pid_file = os.path.join(
-        os.path.expanduser("~"), ".webservice_monitor", "monitor.pid"
-    )
-
-    if not os.path.exists(pid_file):
+    if not _PID_FILE.exists():
         click.echo("错误: 监控未运行，无需重新加载配置")
         return
 
     try:
-        with open(pid_file, "r") as f:
-            pid_str = f.read().strip()
+        pid_str = _PID_FILE.read_text().strip()
 
         try:
             pid = int(pid_str)
         except ValueError:
             click.echo(f"错误: PID文件包含无效的PID: {pid_str}")
-            os.remove(pid_file)
+            _PID_FILE.unlink()
             return
 
         # 检查进程是否存在
         if not psutil.pid_exists(pid):
             click.echo(f"错误: 找不到PID为 {pid} 的进程")
             # 清理过时的PID文件
-            os.remove(pid_file)
+            _PID_FILE.unlink()
             return
 
         # Windows系统重启进程
@@ -720,9 +725,9 @@ def reload_configurations():
                 click.echo(f"终止进程时出错: {str(e)}")
 
             # 确保PID文件被删除
-            if os.path.exists(pid_file):
+            if _PID_FILE.exists():
                 try:
-                    os.remove(pid_file)
+                    _PID_FILE.unlink()
                 except Exception as e:
                     click.echo(f"删除PID文件时出错: {str(e)}")
 
@@ -730,67 +735,30 @@ def reload_configurations():
             click.echo("正在重新启动监控...")
 
             # 简单地启动新进程而不传递复杂参数
-            script_path = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "scripts", "run_monitor.py"
-            )
-
-            if not os.path.exists(script_path):
-                script_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                    "scripts",
-                    "run_monitor.py",
-                )
-
-            if not os.path.exists(script_path):
-                click.echo(f"错误: 未找到运行脚本 {script_path}")
+            script_path = _find_run_script()
+            if not script_path:
+                click.echo("错误: 未找到运行脚本 run_monitor.py")
                 return
 
             try:
-                if os.name == "nt":  # Windows
-                    try:
-                        from subprocess import CREATE_NO_WINDOW
-
-                        process = subprocess.Popen(
-                            [sys.executable, script_path],
-                            creationflags=CREATE_NO_WINDOW,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                        )
-                    except AttributeError:
-                        process = subprocess.Popen(
-                            [sys.executable, script_path],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                        )
-                else:  # Unix/Linux
-                    process = subprocess.Popen(
-                        [sys.executable, script_path],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        start_new_session=True,
-                    )
+                process, log_offset = _spawn_background(
+                    [sys.executable, script_path], _LOG_FILE
+                )
 
                 # 等待短暂时间，检查进程是否立即失败
                 time.sleep(1)
 
                 if process.poll() is not None:
                     click.echo(f"错误: 监控进程启动失败 (退出码: {process.returncode})")
-                    stdout, stderr = process.communicate()
-                    if stdout:
-                        click.echo(
-                            f"输出: {stdout.decode('utf-8', errors='replace').strip()}"
-                        )
-                    if stderr:
-                        click.echo(
-                            f"错误: {stderr.decode('utf-8', errors='replace').strip()}"
-                        )
+                    output = _read_log_since(_LOG_FILE, log_offset)
+                    if output:
+                        click.echo(f"输出: {output}")
                     return
 
                 click.echo(f"监控已在后台重新启动 (PID: {process.pid})")
 
                 # 更新PID文件
-                with open(pid_file, "w") as f:
-                    f.write(str(process.pid))
+                _write_pid_file(process.pid)
 
             except Exception as e:
                 click.echo(f"启动新进程时出错: {str(e)}")
@@ -804,7 +772,7 @@ def reload_configurations():
             except ProcessLookupError:
                 click.echo(f"错误: 找不到PID为 {pid} 的进程")
                 # 清理过时的PID文件
-                os.remove(pid_file)
+                _PID_FILE.unlink()
             except Exception as e:
                 click.echo(f"发送信号时出错: {str(e)}")
 
@@ -821,13 +789,7 @@ def report():
 @report.command("generate")
 @click.option("--date", "-d", help="报告日期 (YYYY-MM-DD)，默认为昨天")
 @click.option("--config", "-c", type=int, help="配置ID，不指定则生成所有配置的报告")
-@click.option(
-    "--format",
-    "-f",
-    type=click.Choice(["html", "pdf"]),
-    default="html",
-    help="报告格式",
-)
+@click.option("--format", "-f", type=_FORMAT_CHOICE, default="html", help="报告格式")
 def generate_report(date, config, format):
     """生成报告"""
     if date:
@@ -841,15 +803,20 @@ def generate_report(date, config, format):
 
     # 验证配置是否存在
     if config:
-        config_obj = repository.get_configuration(config_id=config)
+        config_obj = _get_config_cached(config_id=config)
         if not config_obj:
             click.echo(f"错误: 未找到配置ID {config}")
             return
 
     try:
+        # 报告模块依赖pandas/matplotlib等重量级库，仅在生成报告时导入
         if format == "pdf":
+            from webservice_monitor.reports.pdf_generator import PDFReportGenerator
+
             generator = PDFReportGenerator()
         else:
+            from webservice_monitor.reports.html_generator import HTMLReportGenerator
+
             generator = HTMLReportGenerator()
 
         report_path = generator.generate_report(report_date, config)
@@ -868,6 +835,8 @@ def alert():
 @click.option("--config", "-c", type=int, help="配置ID，不指定则显示所有告警")
 def list_alerts(config):
     """列出活跃告警"""
+    from tabulate import tabulate
+
     alerts = repository.get_active_alerts(config_id=config)
 
     if not alerts:
@@ -877,7 +846,7 @@ def list_alerts(config):
     click.echo(
         "\n"
         + tabulate(
-            [format_alert(alert) for alert in alerts],
+            (format_alert(alert) for alert in alerts),
             headers=["ID", "时间", "配置", "类型", "消息"],
             tablefmt="grid",
         )
@@ -911,8 +880,16 @@ def cleanup_data(days, force):
         click.echo("已取消清理操作")
         return
 
+    deleted_so_far = {}
+
+    def report_progress(table, deleted):
+        deleted_so_far[table] = deleted_so_far.get(table, 0) + deleted
+        click.echo(f"  {table}: 已删除 {deleted_so_far[table]} 条")
+
     try:
-        call_details, minute_stats, alerts = repository.cleanup_old_data(days)
+        call_details, minute_stats, alerts = repository.cleanup_old_data(
+            days, progress=report_progress
+        )
         click.echo(f"已清理 {call_details} 条调用详情记录")
         click.echo(f"已清理 {minute_stats} 条分钟统计记录")
         click.echo(f"已清理 {alerts} 条已解决的告警记录")
@@ -922,14 +899,15 @@ def cleanup_data(days, force):
 
 @cli.command("test")
 @click.option("--url", "-u", required=True, help="接口URL")
-@click.option(
-    "--method", "-m", default="GET", type=click.Choice(["GET", "POST"]), help="请求方法"
-)
+@click.option("--method", "-m", default="GET", type=_METHOD_CHOICE, help="请求方法")
 @click.option("--headers", "-h", help="请求头 (JSON格式)")
 @click.option("--payload", "-p", help="请求正文 (POST方法)")
 @click.option("--timeout", "-t", default=10, type=int, help="超时时间 (秒)")
 @click.option("--repeat", "-r", default=1, type=int, help="重复次数")
-def test_connection(url, method, headers, payload, timeout, repeat):
+@click.option(
+    "--concurrency", "-c", type=int, help="并发请求数，默认为 min(重复次数, 8)"
+)
+def test_connection(url, method, headers, payload, timeout, repeat, concurrency):
     """测试接口连接"""
     if headers:
         try:
@@ -942,29 +920,53 @@ def test_connection(url, method, headers, payload, timeout, repeat):
 
     click.echo(f"开始测试连接 {url} ({method}) ...")
 
-    times = []
+    # 在主线程汇总结果，只保留累计值
+    total_time = 0.0
+    min_time = float("inf")
+    max_time = 0.0
     success_count = 0
 
-    for i in range(repeat):
-        click.echo(f"测试 {i+1}/{repeat}: ", nl=False)
+    if concurrency is None:
+        concurrency = min(repeat, 8)
+    concurrency = max(1, concurrency)
+
+    # 所有重复请求共用一个会话，避免每次重新建立TCP/TLS连接
+    session = WebServiceCaller.session_for(url, pool_maxsize=concurrency)
+
+    # 并发发起请求，按完成顺序输出结果
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                WebServiceCaller.test_connection,
+                url,
+                method,
+                headers_dict,
+                payload,
+                timeout,
+                session,
+            ): i
+            for i in range(repeat)
+        }
 
-        success, message, response_time = WebServiceCaller.test_connection(
-            url, method, headers_dict, payload, timeout
-        )
+        for future in as_completed(futures):
+            i = futures[future]
+            success, message, response_time = future.result()
 
-        if success:
-            click.echo(f"成功 - {response_time:.4f}秒")
-            success_count += 1
-        else:
-            click.echo(f"失败 - {message}")
+            if success:
+                click.echo(f"测试 {i+1}/{repeat}: 成功 - {response_time:.4f}秒")
+                success_count += 1
+            else:
+                click.echo(f"测试 {i+1}/{repeat}: 失败 - {message}")
 
-        times.append(response_time)
+            total_time += response_time
+            if response_time < min_time:
+                min_time = response_time
+            if response_time > max_time:
+                max_time = response_time
 
     # 显示统计结果
     if repeat > 1:
-        avg_time = sum(times) / len(times)
-        min_time = min(times)
-        max_time = max(times)
+        avg_time = total_time / repeat
         success_rate = (success_count / repeat) * 100
 
         click.echo("\n测试结果统计:")
@@ -978,43 +980,44 @@ def test_connection(url, method, headers, payload, timeout, repeat):
 @cli.command("stop-daemon")
 def stop_daemon():
     """停止后台运行的监控守护进程"""
-    pid_file = os.path.join(
-        os.path.expanduser("~"), ".webservice_monitor", "monitor.pid"
-    )
+    import psutil
 
-    if not os.path.exists(pid_file):
+    if not _PID_FILE.exists():
         click.echo("错误: 未找到监控守护进程")
         return
 
     try:
-        with open(pid_file, "r") as f:
-            pid = int(f.read().strip())
+        pid = int(_PID_FILE.read_text().strip())
+
+        process = psutil.Process(pid)
 
         # 尝试发送终止信号
-        os.kill(pid, signal.SIGTERM)
+        process.send_signal(signal.SIGTERM)
         click.echo(f"已发送终止信号到监控守护进程 (PID: {pid})")
 
-        # 等待进程终止
-        for _ in range(5):
-            try:
-                os.kill(pid, 0)  # 检查进程是否存在
-                time.sleep(1)
-            except OSError:
-                # 进程已终止
-                os.remove(pid_file)
-                click.echo("监控守护进程已停止")
-                return
+        # 等待进程终止，进程退出时立即返回
+        try:
+            process.wait(timeout=5)
+            _PID_FILE.unlink()
+            click.echo("监控守护进程已停止")
+            return
+        except psutil.TimeoutExpired:
+            pass
 
         # 如果进程仍然存在，尝试强制终止
         click.echo("进程未响应，尝试强制终止...")
-        os.kill(pid, signal.SIGKILL)
-        os.remove(pid_file)
+        process.kill()
+        try:
+            process.wait(timeout=3)
+        except psutil.TimeoutExpired:
+            pass
+        _PID_FILE.unlink()
         click.echo("监控守护进程已强制停止")
 
     except Exception as e:
         click.echo(f"停止守护进程时出错: {str(e)}")
-        if os.path.exists(pid_file):
-            os.remove(pid_file)
+        if _PID_FILE.exists():
+            _PID_FILE.unlink()
 
 
 if __name__ == "__main__":
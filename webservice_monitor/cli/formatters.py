@@ -4,6 +4,9 @@
 
 from webservice_monitor.db.models import Configuration, Alert
 
+# 告警类型的显示名称
+_TYPE_LABEL = {"availability": "可用性", "performance": "性能"}
+
 
 def format_config(config: Configuration, verbose: bool = False):
     """格式化配置信息用于表格显示"""
@@ -33,8 +36,8 @@ def format_alert(alert: Alert):
     """格式化告警信息用于表格显示"""
     return [
         alert.id,
-        alert.timestamp.split("T")[0] + " " + alert.timestamp.split("T")[1][:8],
+        alert.timestamp.replace("T", " ", 1)[:19],
         alert.config_name,
-        "可用性" if alert.type.value == "availability" else "性能",
+        _TYPE_LABEL.get(alert.type.value, "性能"),
         alert.message,
     ]
@@ -0,0 +1,134 @@
+"""
+异步批量调用实现
+
+在后台事件循环中并发执行同一配置的一批调用，按配置复用ClientSession保持长连接
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, List
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from webservice_monitor.db.models import CallDetail, Configuration
+
+logger = logging.getLogger(__name__)
+
+
+async def _call_one(session, config: Configuration) -> CallDetail:
+    """执行单次异步调用，异常转换为状态码-1"""
+    headers = config.effective_headers
+
+    call_detail = CallDetail(config_id=config.id)
+
+    start_time = time.time()
+    try:
+        async with session.request(
+            "POST" if config.is_post else "GET",
+            config.url,
+            data=config.payload if config.is_post else None,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=config.timeout),
+        ) as response:
+            await response.read()
+            call_detail.status_code = response.status
+    except asyncio.TimeoutError:
+        call_detail.status_code = -1
+        call_detail.error_message = "请求超时"
+    except aiohttp.ClientConnectionError:
+        call_detail.status_code = -1
+        call_detail.error_message = "连接错误"
+    except Exception as e:
+        call_detail.status_code = -1
+        call_detail.error_message = str(e)
+
+    call_detail.response_time = time.time() - start_time
+    return call_detail
+
+
+class AsyncBatchCaller:
+    """异步批量调用器，所有请求在同一个后台事件循环线程中执行"""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # 仅在事件循环线程内访问
+        self._sessions: Dict[int, "aiohttp.ClientSession"] = {}
+
+    @staticmethod
+    def available() -> bool:
+        """是否已安装aiohttp"""
+        return aiohttp is not None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动后台事件循环（仅首次调用时创建）"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-caller", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _batch(self, config: Configuration) -> List[CallDetail]:
+        session = self._sessions.get(config.id)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=max(config.calls_per_batch, 1))
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[config.id] = session
+
+        return await asyncio.gather(
+            *[_call_one(session, config) for _ in range(config.calls_per_batch)]
+        )
+
+    def call_batch(self, config: Configuration) -> List[CallDetail]:
+        """并发执行config.calls_per_batch次调用，阻塞直到全部完成"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._batch(config), loop)
+        return future.result()
+
+    async def _discard(self, config_id: int):
+        session = self._sessions.pop(config_id, None)
+        if session is not None:
+            await session.close()
+
+    def discard(self, config_id: int):
+        """关闭并移除指定配置的会话"""
+        with self._lock:
+            loop = self._loop
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._discard(config_id), loop)
+
+    async def _close_sessions(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+
+    def close(self):
+        """关闭所有会话并停止事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_sessions(), loop).result(
+                timeout=5
+            )
+        except Exception as e:
+            logger.warning(f"关闭异步会话时出错: {str(e)}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
@@ -4,11 +4,14 @@
 
 import time
 import logging
+import threading
 from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from webservice_monitor.db.models import CallDetail, Configuration
+from webservice_monitor.db.models import DEFAULT_HEADERS, CallDetail, Configuration
 
 logger = logging.getLogger(__name__)
 
@@ -16,22 +19,45 @@ logger = logging.getLogger(__name__)
 class WebServiceCaller:
     """WebService调用实现类"""
 
-    @staticmethod
-    def call(config: Configuration) -> CallDetail:
+    _sessions: Dict[str, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    @classmethod
+    def session_for(cls, url: str, pool_maxsize: int = 10) -> requests.Session:
+        """获取按协议和主机缓存的会话，复用已建立的连接"""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+
+        with cls._sessions_lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._sessions[key] = session
+
+        return session
+
+    @classmethod
+    def call(cls, config: Configuration) -> CallDetail:
         """调用WebService接口并返回结果"""
         url = config.url
-        headers = config.headers or {"Content-Type": "application/xml; charset=utf-8"}
+        session = cls.session_for(url)
+        headers = config.effective_headers
 
         call_detail = CallDetail(config_id=config.id)
 
         start_time = time.time()
         try:
             if config.is_post:
-                response = requests.post(
+                response = session.post(
                     url, data=config.payload, headers=headers, timeout=config.timeout
                 )
             else:
-                response = requests.get(url, headers=headers, timeout=config.timeout)
+                response = session.get(url, headers=headers, timeout=config.timeout)
 
             call_detail.status_code = response.status_code
         except requests.exceptions.Timeout:
@@ -54,18 +80,23 @@ class WebServiceCaller:
         headers: Dict = None,
         payload: str = None,
         timeout: int = 10,
+        session: Optional[requests.Session] = None,
     ) -> Tuple[bool, str, float]:
-        """测试连接，返回(成功标志, 消息, 响应时间)"""
-        headers = headers or {"Content-Type": "application/xml; charset=utf-8"}
+        """测试连接，返回(成功标志, 消息, 响应时间)
+
+        传入session时复用其连接池，适合对同一地址的重复测试
+        """
+        headers = headers or DEFAULT_HEADERS
+        http = session or requests
 
         start_time = time.time()
         try:
             if method.upper() == "POST":
-                response = requests.post(
+                response = http.post(
                     url, data=payload, headers=headers, timeout=timeout
                 )
             else:
-                response = requests.get(url, headers=headers, timeout=timeout)
+                response = http.get(url, headers=headers, timeout=timeout)
 
             response_time = time.time() - start_time
 
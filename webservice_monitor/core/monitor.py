@@ -3,15 +3,17 @@
 """
 
 import time
+import heapq
 import logging
 import datetime
-import statistics
+import weakref
 import threading
+from queue import Empty, SimpleQueue
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any, Tuple
-import sys
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from webservice_monitor.db.models import (
     Configuration,
@@ -21,10 +23,22 @@ from webservice_monitor.db.models import (
     AlertType,
 )
 from webservice_monitor.db import repository
-from webservice_monitor.utils.config import get_setting
+from webservice_monitor.core.async_caller import AsyncBatchCaller
+from webservice_monitor.utils.config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
+# 调度堆中代表每分钟统计任务的条目ID
+_STATS_TICK = -1
+# 调度堆中代表定期数据库优化任务的条目ID及其间隔(秒)
+_OPTIMIZE_TICK = -2
+_OPTIMIZE_INTERVAL = 15 * 60
+
+
+def _new_accumulator() -> Dict[str, float]:
+    """创建空的分钟统计累加器"""
+    return {"sum": 0.0, "min": float("inf"), "max": 0.0, "n": 0, "ok": 0}
+
 
 class WebServiceMonitor:
     """WebService监控类"""
@@ -33,31 +47,154 @@ class WebServiceMonitor:
         """初始化监控器"""
         self.executor = None  # 延迟初始化线程池
         self.configurations = {}
-        self.running = False
+        self._config_version = 0  # 配置集合每次变化时递增
+        self._configs_snapshot: List[Dict[str, Any]] = []
+        self._configs_dirty = True
+        # 未运行时处于置位状态，监控循环无需加锁即可判断是否应退出
+        self._stop_event = threading.Event()
+        self._stop_event.set()
+        # 监控器被回收或解释器退出时通知监控循环结束
+        weakref.finalize(self, self._stop_event.set)
+        # 运行中新增的配置ID经队列交给监控循环加入调度堆，并通过_wakeup唤醒循环
+        self._schedule_queue: SimpleQueue = SimpleQueue()
+        self._wakeup = threading.Event()
         self._thread = None
         self._lock = threading.Lock()  # 添加线程锁保护共享资源
+        self._sessions: Dict[int, requests.Session] = {}  # 按配置ID复用的HTTP会话
+        self._sessions_lock = threading.Lock()
+        # 按配置ID累计当前分钟的调用统计，每分钟取出并重置
+        self._acc: Dict[int, Dict[str, float]] = {}
+        self._acc_lock = threading.Lock()
+        # 安装了aiohttp时批量调用并发执行
+        self._async_caller = (
+            AsyncBatchCaller() if AsyncBatchCaller.available() else None
+        )
 
     def load_configurations(self):
         """加载活跃配置"""
         configs = repository.get_all_configurations(active_only=True)
         self.configurations = {config.id: config for config in configs}
+        self._config_version += 1
+        self._configs_dirty = True
         return len(self.configurations)
 
+    @property
+    def running(self) -> bool:
+        """监控是否正在运行"""
+        return not self._stop_event.is_set()
+
+    @property
+    def config_version(self) -> int:
+        """配置集合的版本号，用于判断配置是否发生变化"""
+        return self._config_version
+
+    def get_configs_snapshot(self) -> List[Dict[str, Any]]:
+        """获取配置的简要列表(ID和名称)，配置未变化时复用缓存"""
+        if self._configs_dirty:
+            self._configs_snapshot = [
+                {"id": k, "name": v.name} for k, v in self.configurations.items()
+            ]
+            self._configs_dirty = False
+        return self._configs_snapshot
+
+    def apply_config_delta(
+        self, new_configs: Dict[int, Configuration]
+    ) -> Tuple[set, set, set]:
+        """就地应用新的配置集合，无需停止监控，返回(新增, 移除, 变更)的配置ID"""
+        with self._lock:
+            old_configs = self.configurations
+            added = new_configs.keys() - old_configs.keys()
+            removed = old_configs.keys() - new_configs.keys()
+            changed = {
+                k
+                for k in new_configs.keys() & old_configs.keys()
+                if new_configs[k] != old_configs[k]
+            }
+            # 连接池大小按每批调用次数创建，次数变化的配置需重建会话
+            resized = {
+                k
+                for k in changed
+                if new_configs[k].calls_per_batch != old_configs[k].calls_per_batch
+            }
+
+            # 整体替换字典引用，读取方始终看到一致的配置集合
+            self.configurations = dict(new_configs)
+            if added or removed or changed:
+                self._config_version += 1
+                self._configs_dirty = True
+
+            if self.running:
+                for cid in added:
+                    self._schedule_queue.put(cid)
+                if added:
+                    self._wakeup.set()
+
+        # 清理已移除配置的会话和累加器，每批调用次数变化的配置下次调用时重建会话
+        stale = removed | resized
+        with self._sessions_lock:
+            sessions = [
+                self._sessions.pop(cid) for cid in stale if cid in self._sessions
+            ]
+        for session in sessions:
+            session.close()
+        with self._acc_lock:
+            for cid in removed:
+                self._acc.pop(cid, None)
+        if self._async_caller is not None:
+            for cid in stale:
+                self._async_caller.discard(cid)
+
+        return added, removed, changed
+
+    def _session_for(self, config: Configuration) -> requests.Session:
+        """获取配置对应的HTTP会话，首次使用时创建，保持长连接"""
+        with self._sessions_lock:
+            session = self._sessions.get(config.id)
+            if session is None:
+                session = requests.Session()
+                # 连接池需容纳整批并发调用，否则urllib3会丢弃多余连接并记录
+                # "Connection pool is full"警告
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=max(SETTINGS.MAX_WORKERS, config.calls_per_batch),
+                    pool_block=False,
+                    max_retries=0,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[config.id] = session
+        return session
+
+    def _close_sessions(self):
+        """关闭所有HTTP会话"""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
     def call_webservice(self, config: Configuration) -> CallDetail:
         """调用WebService并返回结果"""
+        call_detail = self._perform_call(config)
+        self._record_call_details(config, [call_detail])
+        return call_detail
+
+    def _perform_call(self, config: Configuration) -> CallDetail:
+        """执行一次调用，不保存结果"""
         url = config.url
-        headers = config.headers or {"Content-Type": "application/xml; charset=utf-8"}
+        session = self._session_for(config)
+        headers = config.effective_headers
 
         call_detail = CallDetail(config_id=config.id)
 
         start_time = time.time()
         try:
             if config.is_post:
-                response = requests.post(
+                response = session.post(
                     url, data=config.payload, headers=headers, timeout=config.timeout
                 )
             else:
-                response = requests.get(url, headers=headers, timeout=config.timeout)
+                response = session.get(url, headers=headers, timeout=config.timeout)
 
             call_detail.status_code = response.status_code
         except Exception as e:
@@ -65,63 +202,127 @@ class WebServiceMonitor:
             call_detail.error_message = str(e)
 
         call_detail.response_time = time.time() - start_time
+        return call_detail
 
-        # 保存调用详情
-        try:
-            call_detail_id = repository.save_call_detail(call_detail)
+    def _record_call_details(self, config: Configuration, details: List[CallDetail]):
+        """保存一批调用详情，失败或超过阈值的调用批量创建告警"""
+        if not details:
+            return
+
+        # 单次遍历同时完成统计汇总和告警判断
+        total = 0.0
+        low = float("inf")
+        high = 0.0
+        ok = 0
+        alerts = []
+        threshold = config.alert_threshold
+        for call_detail in details:
+            response_time = call_detail.response_time
+            total += response_time
+            if response_time < low:
+                low = response_time
+            if response_time > high:
+                high = response_time
 
             # 检查是否需要触发告警
-            if (
-                not call_detail.is_success
-                or call_detail.response_time > config.alert_threshold
-            ):
-                alert_type = (
-                    AlertType.AVAILABILITY
-                    if not call_detail.is_success
-                    else AlertType.PERFORMANCE
-                )
-                alert_message = (
-                    f"状态码: {call_detail.status_code}"
-                    if not call_detail.is_success
-                    else f"响应时间: {call_detail.response_time:.2f}秒 > {config.alert_threshold}秒"
+            if call_detail.is_success:
+                ok += 1
+                if response_time > threshold:
+                    alerts.append(
+                        (
+                            config.id,
+                            AlertType.PERFORMANCE,
+                            f"响应时间: {response_time:.2f}秒 > {threshold}秒",
+                        )
+                    )
+            else:
+                alerts.append(
+                    (
+                        config.id,
+                        AlertType.AVAILABILITY,
+                        f"状态码: {call_detail.status_code}",
+                    )
                 )
 
-                repository.create_alert(config.id, alert_type, alert_message)
+        self._accumulate(config.id, len(details), total, low, high, ok)
+
+        try:
+            # 调用详情交给后台线程合并写入，不阻塞调用线程
+            repository.enqueue_call_details(details)
+
+            if alerts:
+                repository.create_alerts(alerts)
 
                 # 记录告警日志
-                logger.warning(
-                    f"告警: 配置 {config.name} ({config.id}) - {alert_message}"
-                )
+                for _, _, alert_message in alerts:
+                    logger.warning(
+                        f"告警: 配置 {config.name} ({config.id}) - {alert_message}"
+                    )
         except Exception as e:
             logger.exception(f"保存调用详情或创建告警时出错: {str(e)}")
 
-        return call_detail
+    def _accumulate(
+        self, config_id: int, n: int, total: float, low: float, high: float, ok: int
+    ):
+        """将一批调用的局部汇总合并到所属配置的分钟统计累加器，持锁时只做一次合并"""
+        with self._acc_lock:
+            acc = self._acc.get(config_id)
+            if acc is None:
+                acc = self._acc[config_id] = _new_accumulator()
+            acc["n"] += n
+            acc["sum"] += total
+            if low < acc["min"]:
+                acc["min"] = low
+            if high > acc["max"]:
+                acc["max"] = high
+            acc["ok"] += ok
 
     def batch_call_webservice(self, config: Configuration) -> List[CallDetail]:
         """批量调用WebService"""
         if not self._is_in_monitoring_hours(config):
             logger.info(
-                f"配置 {config.name} 当前不在监控时间段 ({config.monitoring_hours}) 内"
+                "配置 %s 当前不在监控时间段 (%s) 内",
+                config.name,
+                config.monitoring_hours,
             )
             return []
 
-        results = []
-        for _ in range(config.calls_per_batch):
+        if self._async_caller is not None:
+            # 一批调用并发执行，耗时约为单次最慢调用的时间
             try:
-                result = self.call_webservice(config)
-                results.append(result)
-                logger.info(
-                    f"调用完成: {config.name} - 状态码: {result.status_code}, "
-                    f"响应时间: {result.response_time:.4f}秒"
-                )
+                results = self._async_caller.call_batch(config)
             except Exception as e:
                 logger.exception(f"调用 {config.name} 时出错: {str(e)}")
+                return []
 
-            # 短暂暂停避免请求过快
-            time.sleep(0.2)
-
+        else:
+            results = []
+            for _ in range(config.calls_per_batch):
+                try:
+                    results.append(self._perform_call(config))
+                except Exception as e:
+                    logger.exception(f"调用 {config.name} 时出错: {str(e)}")
+
+        # 日志级别过滤掉INFO时跳过整个循环
+        if logger.isEnabledFor(logging.INFO):
+            for result in results:
+                self._log_call_result(config, result)
+
+        # 整批结果一次性写入
+        if results:
+            self._record_call_details(config, results)
         return results
 
+    @staticmethod
+    def _log_call_result(config: Configuration, result: CallDetail):
+        """记录单次调用结果日志"""
+        logger.info(
+            "调用完成: %s - 状态码: %s, 响应时间: %.4f秒",
+            config.name,
+            result.status_code,
+            result.response_time,
+        )
+
     def calculate_minute_stats(self, config_id: int = None):
         """计算过去一分钟的统计数据"""
         now = datetime.datetime.now()
@@ -129,81 +330,68 @@ class WebServiceMonitor:
 
         config_ids = [config_id] if config_id else list(self.configurations.keys())
 
+        start_time = one_minute_ago.isoformat()
+        end_time = now.isoformat()
+        computed = []
         for cid in config_ids:
-            if cid not in self.configurations:
+            config = self.configurations.get(cid)
+            if config is None:
                 continue
 
-            config = self.configurations[cid]
-
-            # 从数据库获取过去一分钟内的调用详情
-            try:
-                with repository.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """SELECT response_time, status_code FROM call_details 
-                        WHERE timestamp >= ? AND timestamp <= ? AND config_id = ?""",
-                        (one_minute_ago.isoformat(), now.isoformat(), cid),
-                    )
-
-                    results = cursor.fetchall()
+            # 取出并重置该配置的累加器，调用线程随后写入新的累加器
+            with self._acc_lock:
+                acc = self._acc.pop(cid, None)
 
-                if not results:
-                    continue
+            if not acc or not acc["n"]:
+                continue
 
-                response_times = [row["response_time"] for row in results]
-                success_count = sum(
-                    1 for row in results if 200 <= row["status_code"] < 300
-                )
+            # 计算统计数据
+            call_count = acc["n"]
+            stats = MinuteStats(
+                start_time=start_time,
+                end_time=end_time,
+                avg_response_time=acc["sum"] / call_count,
+                max_response_time=acc["max"],
+                min_response_time=acc["min"],
+                call_count=call_count,
+                success_count=acc["ok"],
+                config_id=cid,
+            )
+            computed.append((config, stats))
 
-                # 计算统计数据
-                stats = MinuteStats(
-                    start_time=one_minute_ago.isoformat(),
-                    end_time=now.isoformat(),
-                    avg_response_time=statistics.mean(response_times),
-                    max_response_time=max(response_times),
-                    min_response_time=min(response_times),
-                    call_count=len(response_times),
-                    success_count=success_count,
-                    config_id=cid,
-                )
+        if not computed:
+            return
 
-                # 保存统计数据
-                repository.save_minute_stats(stats)
+        # 所有配置的统计数据在一个事务中保存
+        try:
+            repository.save_minute_stats_bulk([stats for _, stats in computed])
+        except Exception as e:
+            logger.exception(f"保存统计数据时出错: {str(e)}")
+            return
 
-                # 记录日志
-                success_rate = (
-                    (success_count / len(response_times)) * 100 if response_times else 0
-                )
+        # 记录日志
+        if logger.isEnabledFor(logging.INFO):
+            for config, stats in computed:
                 logger.info(
-                    f"一分钟统计: {config.name} - 总调用: {stats.call_count}, 成功率: {success_rate:.2f}%, "
-                    f"平均响应时间: {stats.avg_response_time:.4f}秒"
+                    "一分钟统计: %s - 总调用: %d, 成功率: %.2f%%, 平均响应时间: %.4f秒",
+                    config.name,
+                    stats.call_count,
+                    (stats.success_count / stats.call_count) * 100,
+                    stats.avg_response_time,
                 )
-            except Exception as e:
-                logger.exception(f"计算配置 {cid} 的统计数据时出错: {str(e)}")
 
     def _is_in_monitoring_hours(self, config: Configuration) -> bool:
         """检查当前时间是否在监控时间段内"""
-        now = datetime.datetime.now()
-        current_hour = now.hour
-
-        monitoring_hours = config.monitoring_hours
-
-        try:
-            if "-" in monitoring_hours:
-                start_hour, end_hour = map(int, monitoring_hours.split("-"))
-                if start_hour <= end_hour:
-                    return start_hour <= current_hour <= end_hour
-                else:  # 跨天的情况
-                    return current_hour >= start_hour or current_hour <= end_hour
-            else:
-                # 单个小时
-                return current_hour == int(monitoring_hours)
-        except (ValueError, TypeError):
-            logger.warning(
-                f"配置 {config.name} 的监控时间段 '{monitoring_hours}' 格式无效，默认全天监控"
-            )
+        hours = config.parsed_hours
+        if hours is None:
             return True
 
+        start_hour, end_hour, wraps = hours
+        current_hour = datetime.datetime.now().hour
+        if wraps:  # 跨天的情况
+            return current_hour >= start_hour or current_hour <= end_hour
+        return start_hour <= current_hour <= end_hour
+
     def start(self, config_ids=None):
         """启动监控"""
         with self._lock:
@@ -222,21 +410,23 @@ class WebServiceMonitor:
                 self.configurations = {
                     k: v for k, v in self.configurations.items() if k in config_ids
                 }
+                self._config_version += 1
+                self._configs_dirty = True
 
             if not self.configurations:
                 logger.warning("没有找到活跃的配置，监控未启动")
                 return False
 
             # 初始化线程池，延迟创建确保不会过早关闭
-            max_workers = get_setting("MAX_WORKERS", 10)
+            max_workers = SETTINGS.MAX_WORKERS
             self.executor = ThreadPoolExecutor(max_workers=max_workers)
 
-            self.running = True
+            self._stop_event.clear()
             self._thread = threading.Thread(target=self._monitoring_loop)
             self._thread.daemon = False  # 非守护线程，主线程退出后继续运行
             self._thread.start()
 
-            logger.info(f"监控已启动，正在监控 {len(self.configurations)} 个配置")
+            logger.info("监控已启动，正在监控 %d 个配置", len(self.configurations))
             return True
 
     def stop(self):
@@ -247,7 +437,9 @@ class WebServiceMonitor:
                 return False
 
             logger.info("正在停止监控...")
-            self.running = False
+            self._stop_event.set()
+            self._wakeup.set()
+            self._configs_dirty = True
 
             # 等待监控线程结束
             if self._thread and self._thread.is_alive():
@@ -270,75 +462,118 @@ class WebServiceMonitor:
                     self.executor.shutdown(wait=True)
                 self.executor = None
 
+            self._close_sessions()
+            try:
+                repository.flush_call_details()
+                repository.optimize_db()
+            except Exception as e:
+                logger.warning("优化数据库时出错: %s", e)
+            with self._acc_lock:
+                self._acc.clear()
+            if self._async_caller is not None:
+                self._async_caller.close()
+
             logger.info("监控已停止")
             return True
 
+    def _build_schedule(self) -> List[Tuple[float, int]]:
+        """构建由(下次触发时间, 配置ID)组成的最小堆，包含每分钟统计任务"""
+        now = time.time()
+        heap = [
+            (now + max(config.call_interval, 1), cid)
+            for cid, config in self.configurations.items()
+        ]
+        heap.append((self._get_next_minute_mark().timestamp(), _STATS_TICK))
+        heap.append((now + _OPTIMIZE_INTERVAL, _OPTIMIZE_TICK))
+        heapq.heapify(heap)
+        return heap
+
+    def _drain_schedule_queue(self, heap: List[Tuple[float, int]], scheduled: set):
+        """将运行期间新增的配置加入调度堆"""
+        now = time.time()
+        while True:
+            try:
+                cid = self._schedule_queue.get_nowait()
+            except Empty:
+                return
+            config = self.configurations.get(cid)
+            if config is None or cid in scheduled:
+                continue
+            heapq.heappush(heap, (now + max(config.call_interval, 1), cid))
+            scheduled.add(cid)
+
     def _monitoring_loop(self):
-        """监控循环"""
-        next_minute_mark = self._get_next_minute_mark()
-        stats_calculated = False
+        """监控循环，仅在堆顶任务到期时被唤醒执行调度"""
+        heap = self._build_schedule()
+        scheduled = {cid for _, cid in heap}
         error_count = 0
 
-        while self.running:
+        while not self._stop_event.is_set():
             try:
-                # 如果解释器正在关闭，安全退出
-                if sys.is_finalizing():
-                    logger.warning("检测到解释器正在关闭，停止监控循环")
-                    break
-
-                now = datetime.datetime.now()
+                self._drain_schedule_queue(heap, scheduled)
+
+                fire_at, cid = heap[0]
+                delay = fire_at - time.time()
+                if delay > 0:
+                    # 等待到下一个任务到期，停止或新增配置时立即被唤醒
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+                    continue
 
                 # 每分钟计算一次统计数据
-                if now >= next_minute_mark and not stats_calculated:
+                if cid == _STATS_TICK:
+                    heapq.heapreplace(
+                        heap, (self._get_next_minute_mark().timestamp(), _STATS_TICK)
+                    )
                     try:
                         self.calculate_minute_stats()
-                        stats_calculated = True
                         logger.debug("已计算统计数据")
                     except Exception as e:
                         logger.exception("计算统计数据时出错")
+                    continue
 
-                # 设置下一个分钟标记
-                if now >= next_minute_mark and stats_calculated:
-                    next_minute_mark = self._get_next_minute_mark()
-                    stats_calculated = False
-                    logger.debug(f"设置下一个分钟标记: {next_minute_mark}")
+                if cid == _OPTIMIZE_TICK:
+                    heapq.heapreplace(
+                        heap, (time.time() + _OPTIMIZE_INTERVAL, _OPTIMIZE_TICK)
+                    )
+                    try:
+                        repository.optimize_db()
+                    except Exception as e:
+                        logger.warning("优化数据库时出错: %s", e)
+                    continue
 
-                # 对每个配置执行监控
-                with self._lock:
-                    # 如果监控已停止或解释器正在关闭，安全退出
-                    if not self.running or sys.is_finalizing():
-                        break
+                config = self.configurations.get(cid)
+                if config is None:
+                    # 配置已被移除
+                    heapq.heappop(heap)
+                    scheduled.discard(cid)
+                    continue
+
+                # 安排下一次调用，落后太多时不补发错过的调用
+                now = time.time()
+                interval = max(config.call_interval, 1)
+                next_fire = fire_at + interval
+                if next_fire <= now:
+                    next_fire = now + interval
+                heapq.heapreplace(heap, (next_fire, cid))
+
+                # 线程池只在stop()中关闭，分发过程无需持有_lock，
+                # 避免与start()/stop()等控制操作争用
+                executor = self.executor
+                if executor is None or self._stop_event.is_set():
+                    break
 
-                    # 检查线程池是否有效
-                    if not self.executor or getattr(self.executor, "_shutdown", False):
-                        logger.warning("线程池已关闭，重新初始化")
-                        try:
-                            max_workers = get_setting("MAX_WORKERS", 10)
-                            self.executor = ThreadPoolExecutor(max_workers=max_workers)
-                        except Exception as e:
-                            logger.exception("重新初始化线程池失败")
-                            break
-
-                    for config_id, config in list(self.configurations.items()):
-                        try:
-                            if self._should_call_now(config):
-                                # 安全地提交任务
-                                if (
-                                    not getattr(self.executor, "_shutdown", False)
-                                    and self.running
-                                ):
-                                    self.executor.submit(
-                                        self.batch_call_webservice, config
-                                    )
-                        except Exception as e:
-                            logger.exception(f"为配置 {config.name} 调度监控任务时出错")
+                try:
+                    if self._is_in_monitoring_hours(config):
+                        executor.submit(self.batch_call_webservice, config)
+                except Exception as e:
+                    if self._stop_event.is_set():
+                        break
+                    logger.exception(f"为配置 {config.name} 调度监控任务时出错")
 
                 # 重置错误计数器
                 error_count = 0
 
-                # 短暂睡眠
-                time.sleep(1)
-
             except Exception as e:
                 error_count += 1
                 logger.exception(f"监控循环出错: {str(e)}")
@@ -346,10 +581,10 @@ class WebServiceMonitor:
                 # 连续错误过多，暂停较长时间
                 if error_count > 5:
                     logger.warning(f"连续错误超过5次，暂停30秒")
-                    time.sleep(30)
+                    self._stop_event.wait(30)
                     error_count = 0
                 else:
-                    time.sleep(5)
+                    self._stop_event.wait(5)
 
         logger.info("监控循环已退出")
 
@@ -357,14 +592,3 @@ class WebServiceMonitor:
         """获取下一分钟的时间点"""
         now = datetime.datetime.now()
         return (now + datetime.timedelta(minutes=1)).replace(second=0, microsecond=0)
-
-    def _should_call_now(self, config):
-        """判断是否应当在当前时间调用指定配置"""
-        if not self._is_in_monitoring_hours(config):
-            return False
-
-        # 根据调用间隔判断是否应当调用
-        now = datetime.datetime.now()
-        seconds_in_minute = now.second
-
-        return seconds_in_minute % config.call_interval == 0
@@ -104,21 +104,20 @@ class MonitorScheduler:
                 return False, "监控未运行，无需重新加载配置"
 
             try:
-                # 停止当前监控
-                self.monitor.stop()
-
-                # 重新启动监控
-                success = self.monitor.start()
-                if success:
-                    self.active_configs_count = len(self.monitor.configurations)
-                    return (
-                        True,
-                        f"配置已重新加载，正在监控 {self.active_configs_count} 个配置",
-                    )
-                else:
-                    self.status = "stopped"
-                    return False, "重新加载配置失败，可能没有可用配置"
+                # 就地应用配置差异，不停止监控线程和线程池
+                configs = repository.get_all_configurations(active_only=True)
+                added, removed, changed = self.monitor.apply_config_delta(
+                    {config.id: config for config in configs}
+                )
+                self.active_configs_count = len(self.monitor.configurations)
+                logger.info(
+                    f"配置差异已应用: 新增 {len(added)}, 移除 {len(removed)}, "
+                    f"变更 {len(changed)}"
+                )
+                return (
+                    True,
+                    f"配置已重新加载，正在监控 {self.active_configs_count} 个配置",
+                )
             except Exception as e:
                 logger.exception("重新加载配置时出错")
-                self.status = "stopped"
                 return False, f"重新加载配置时出错: {str(e)}"
@@ -3,10 +3,20 @@
 """
 
 import json
+import time
+import logging
 import datetime
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Optional, Dict, List
+from functools import cached_property
+from dataclasses import dataclass, field, fields
+from typing import Optional, Dict, List, Tuple
+
+from webservice_monitor.utils import serialization
+
+logger = logging.getLogger(__name__)
+
+# 配置未指定请求头时使用的默认请求头
+DEFAULT_HEADERS = {"Content-Type": "application/xml; charset=utf-8"}
 
 
 class AlertType(Enum):
@@ -16,6 +26,16 @@ class AlertType(Enum):
     PERFORMANCE = "performance"
 
 
+def _decode_headers(raw) -> Dict:
+    """解析数据库中保存的头信息JSON，无效时返回空字典"""
+    if raw:
+        try:
+            return serialization.loads(raw)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
 @dataclass
 class Configuration:
     """接口配置数据类"""
@@ -34,6 +54,15 @@ class Configuration:
     monitoring_hours: str = "0-23"
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    # (原始字符串, 解析结果)，monitoring_hours变化后自动重新解析
+    _hours_cache: Optional[Tuple[str, Optional[Tuple[int, int, bool]]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # 以下派生值在headers/method赋值时由__setattr__同步更新，
+    # 就地修改headers字典不会触发更新
+    effective_headers: Dict = field(init=False, repr=False, compare=False)
+    _headers_json: str = field(init=False, repr=False, compare=False)
+    _method_is_post: bool = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.created_at is None:
@@ -41,46 +70,72 @@ class Configuration:
         if self.updated_at is None:
             self.updated_at = self.created_at
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == "headers":
+            super().__setattr__("effective_headers", value or DEFAULT_HEADERS)
+            super().__setattr__("_headers_json", serialization.dumps(value).decode())
+            self.__dict__.pop("headers_pretty", None)
+        elif name == "method":
+            super().__setattr__("_method_is_post", value.upper() == "POST")
+
     @property
     def is_post(self):
         """是否是POST请求"""
-        return self.method.upper() == "POST"
+        return self._method_is_post
+
+    @property
+    def parsed_hours(self) -> Optional[Tuple[int, int, bool]]:
+        """监控时段解析为(开始小时, 结束小时, 是否跨天)，格式无效时为None表示全天"""
+        cache = self._hours_cache
+        if cache is not None and cache[0] == self.monitoring_hours:
+            return cache[1]
+
+        hours = self.monitoring_hours
+        try:
+            if "-" in hours:
+                start_hour, end_hour = map(int, hours.split("-"))
+            else:
+                # 单个小时
+                start_hour = end_hour = int(hours)
+            parsed = (start_hour, end_hour, start_hour > end_hour)
+        except (ValueError, TypeError):
+            logger.warning(
+                f"配置 {self.name} 的监控时段 '{hours}' 格式无效，默认全天监控"
+            )
+            parsed = None
+
+        self._hours_cache = (hours, parsed)
+        return parsed
 
     @property
     def headers_json(self):
         """获取头信息的JSON字符串"""
-        return json.dumps(self.headers)
+        return self._headers_json
+
+    @cached_property
+    def headers_pretty(self):
+        """获取缩进格式的头信息字符串（首次访问后缓存）"""
+        return serialization.dumps(self.headers, indent=True).decode()
+
+    @classmethod
+    def from_values(cls, values):
+        """从按CONFIG_COLUMNS顺序排列的列值创建配置对象"""
+        values = list(values)
+        values[_HEADERS_INDEX] = _decode_headers(values[_HEADERS_INDEX])
+        values[_ACTIVE_INDEX] = bool(values[_ACTIVE_INDEX])
+        config = cls(*values)
+
+        # 预先解析监控时段，格式错误只记录一次日志
+        config.parsed_hours
+        return config
 
     @classmethod
     def from_row(cls, row):
         """从数据库行创建配置对象"""
         if not row:
             return None
-
-        config = cls(
-            id=row["id"],
-            name=row["name"],
-            url=row["url"],
-            method=row["method"],
-            payload=row["payload"],
-            call_interval=row["call_interval"],
-            calls_per_batch=row["calls_per_batch"],
-            timeout=row["timeout"],
-            alert_threshold=row["alert_threshold"],
-            is_active=bool(row["is_active"]),
-            monitoring_hours=row["monitoring_hours"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-        )
-
-        # 解析头信息
-        if row["headers"]:
-            try:
-                config.headers = json.loads(row["headers"])
-            except json.JSONDecodeError:
-                config.headers = {}
-
-        return config
+        return cls.from_values(row[column] for column in CONFIG_COLUMNS)
 
     @classmethod
     def from_json(cls, json_data, name=None):
@@ -97,15 +152,22 @@ class Configuration:
         config.alert_threshold = json_data.get("alert_threshold", 2.0)
         config.monitoring_hours = json_data.get("monitoring_hours", "0-23")
 
+        config.parsed_hours
         return config
 
 
+# 与Configuration构造参数顺序一致的configurations表列，按此顺序查询可直接位置传参
+CONFIG_COLUMNS = tuple(f.name for f in fields(Configuration) if f.init)
+_HEADERS_INDEX = CONFIG_COLUMNS.index("headers")
+_ACTIVE_INDEX = CONFIG_COLUMNS.index("is_active")
+
+
 @dataclass
 class CallDetail:
     """调用详情数据类"""
 
     id: Optional[int] = None
-    timestamp: Optional[str] = None
+    timestamp: Optional[int] = None  # 毫秒级Unix时间戳
     response_time: float = 0.0
     status_code: int = 0
     error_message: Optional[str] = None
@@ -113,7 +175,7 @@ class CallDetail:
 
     def __post_init__(self):
         if self.timestamp is None:
-            self.timestamp = datetime.datetime.now().isoformat()
+            self.timestamp = time.time_ns() // 1_000_000
 
     @property
     def is_success(self):
@@ -147,7 +209,7 @@ class Alert:
     message: str = ""
     resolved: bool = False
     resolved_at: Optional[str] = None
-    config_name: Optional[str] = None  # 非数据库字段，用于显示
+    config_name: Optional[str] = None  # 创建告警时冗余保存的配置名称
 
     def __post_init__(self):
         if self.timestamp is None:
@@ -3,15 +3,21 @@
 """
 
 import os
+import queue
+import atexit
+import pathlib
 import sqlite3
 import logging
+import threading
 import datetime
+import time
+import functools
 from contextlib import contextmanager
-from typing import List, Optional, Dict, Any, Tuple
-
-import pandas as pd
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Dict, Any, Tuple
 
 from webservice_monitor.db.models import (
+    CONFIG_COLUMNS,
     Configuration,
     CallDetail,
     MinuteStats,
@@ -23,240 +29,489 @@ from webservice_monitor.utils.config import get_setting
 logger = logging.getLogger(__name__)
 
 
-@contextmanager
-def get_connection():
-    """获取数据库连接的上下文管理器"""
-    db_path = get_setting("DB_PATH")
-    conn = sqlite3.connect(db_path)
+# 连接在进程生命周期内复用：写操作共用一个由锁串行化的写连接，
+# 读操作每个线程各用一个读连接
+_local = threading.local()
+_writer_lock = threading.RLock()
+# 写连接状态，仅在持有_writer_lock时访问
+_writer = SimpleNamespace(conn=None, db_path=None, depth=0)
+
+# 调用详情写入队列：调用线程只负责入队，由单个后台线程合并成一个事务写入
+_CALL_BATCH_MAX_ROWS = 500
+_CALL_BATCH_MAX_WAIT = 0.25  # 秒
+_call_queue: "queue.Queue[List[tuple]]" = queue.Queue()
+_flusher_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+# 高频写入语句，始终传入同一个字符串对象以命中sqlite3的预编译语句缓存
+_SQL_INSERT_CALL = (
+    "INSERT INTO call_details "
+    "(timestamp, response_time, status_code, error_message, config_id) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_STATS = (
+    "INSERT INTO minute_stats "
+    "(start_time, end_time, avg_response_time, max_response_time, "
+    "min_response_time, call_count, success_count, config_id) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# minute_stats列及其DataFrame类型，报告查询按此顺序取列，避免pandas逐列推断类型
+_STATS_DTYPES = {
+    "id": "int64",
+    "start_time": "object",
+    "end_time": "object",
+    "avg_response_time": "float64",
+    "max_response_time": "float64",
+    "min_response_time": "float64",
+    "call_count": "int64",
+    "success_count": "int64",
+    "config_id": "Int64",
+}
+_SQL_SELECT_STATS = f"SELECT {', '.join(_STATS_DTYPES)} FROM minute_stats"
+_SQL_INSERT_ALERT = (
+    "INSERT INTO alerts (config_id, timestamp, type, message, config_name) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _db_path() -> str:
+    """数据库路径，首次读取后缓存，避免每次获取连接都查询配置"""
+    return get_setting("DB_PATH")
+
+
+def reset_db_path_cache():
+    """清除数据库路径缓存，修改DB_PATH配置后调用"""
+    _db_path.cache_clear()
+
+
+_SQL_SELECT_CONFIG = f"SELECT {', '.join(CONFIG_COLUMNS)} FROM configurations"
+# 按条件查询配置的完整语句在导入时拼好，每次调用传入同一个字符串对象
+_SQL_CONFIG_BY_ID = f"{_SQL_SELECT_CONFIG} WHERE id = ?"
+_SQL_CONFIG_BY_NAME = f"{_SQL_SELECT_CONFIG} WHERE name = ?"
+_SQL_ACTIVE_CONFIGS = f"{_SQL_SELECT_CONFIG} WHERE is_active = 1 ORDER BY name"
+_SQL_ALL_CONFIGS = f"{_SQL_SELECT_CONFIG} ORDER BY name"
+
+
+def _config_factory(cursor: sqlite3.Cursor, row: tuple) -> Configuration:
+    """行工厂：按CONFIG_COLUMNS顺序取出的列直接构造配置对象"""
+    return Configuration.from_values(row)
+
+
+def _apply_connection_pragmas(conn: sqlite3.Connection):
+    """设置连接级PRAGMA（这些设置不会持久化到数据库文件）"""
+    conn.execute("PRAGMA busy_timeout=30000")
+    # WAL模式下NORMAL同步级别仍能保证数据库一致性，且每次提交少一次fsync
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # 页缓存按需增长，上限64MB可容纳报告扫描一整天的分钟统计；
+    # 通过mmap读取页面，缓存命中时省去pread系统调用
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA journal_size_limit=67108864")
+
+
+def _open_connection(db_path: str, **kwargs) -> sqlite3.Connection:
+    """建立新连接并应用PRAGMA"""
+    conn = sqlite3.connect(db_path, timeout=30, **kwargs)
     conn.row_factory = sqlite3.Row
+    _apply_connection_pragmas(conn)
+    return conn
+
+
+@contextmanager
+def _scoped(conn: sqlite3.Connection, state):
+    """连接使用范围：出错时回滚，最外层退出时丢弃未提交的修改"""
+    state.depth += 1
     try:
         yield conn
+    except BaseException:
+        conn.rollback()
+        raise
     finally:
-        conn.close()
+        state.depth -= 1
+        if state.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+
+@contextmanager
+def writer_conn():
+    """获取进程内共享的写连接，持有期间其他线程的写操作等待"""
+    db_path = _db_path()
+    with _writer_lock:
+        if _writer.conn is None or _writer.db_path != db_path:
+            if _writer.conn is not None:
+                _writer.conn.close()
+            _writer.conn = _open_connection(
+                db_path, check_same_thread=False, cached_statements=512
+            )
+            _writer.db_path = db_path
+            _writer.depth = 0
+
+        with _scoped(_writer.conn, _writer) as conn:
+            yield conn
+
+
+@contextmanager
+def reader_conn():
+    """获取当前线程的只读连接，数据库路径变化时重新连接"""
+    db_path = _db_path()
+    # 内存数据库每个连接相互独立，读写必须使用同一个连接
+    if db_path == ":memory:":
+        with writer_conn() as conn:
+            yield conn
+        return
+
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.db_path != db_path:
+        if conn is not None:
+            conn.close()
+        # 以只读URI打开，SQLite不会为该连接准备任何写操作
+        conn = _local.conn = _open_connection(
+            f"{pathlib.Path(db_path).absolute().as_uri()}?mode=ro",
+            uri=True,
+            cached_statements=256,
+        )
+        _local.db_path = db_path
+        _local.depth = 0
+
+    with _scoped(conn, _local) as conn:
+        yield conn
+
+
+_CALL_DETAILS_TABLE = """
+CREATE TABLE IF NOT EXISTS call_details (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp INTEGER,
+    response_time REAL,
+    status_code INTEGER,
+    error_message TEXT,
+    config_id INTEGER,
+    FOREIGN KEY(config_id) REFERENCES configurations(id)
+);
+"""
+
+# 建表语句，通过executescript一次性执行
+_SCHEMA_SQL = (
+    """
+-- 配置表
+CREATE TABLE IF NOT EXISTS configurations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    url TEXT NOT NULL,
+    method TEXT NOT NULL,
+    headers TEXT,
+    payload TEXT,
+    call_interval INTEGER DEFAULT 5,
+    calls_per_batch INTEGER DEFAULT 5,
+    timeout INTEGER DEFAULT 10,
+    alert_threshold REAL DEFAULT 2.0,
+    is_active INTEGER DEFAULT 1,
+    monitoring_hours TEXT DEFAULT '0-23',
+    created_at TEXT,
+    updated_at TEXT
+);
+"""
+    + _CALL_DETAILS_TABLE
+    + """
+-- 统计数据表
+CREATE TABLE IF NOT EXISTS minute_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_time TEXT,
+    end_time TEXT,
+    avg_response_time REAL,
+    max_response_time REAL,
+    min_response_time REAL,
+    call_count INTEGER,
+    success_count INTEGER,
+    config_id INTEGER,
+    FOREIGN KEY(config_id) REFERENCES configurations(id)
+);
+
+-- 告警表
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_id INTEGER,
+    timestamp TEXT,
+    type TEXT,
+    message TEXT,
+    resolved INTEGER DEFAULT 0,
+    resolved_at TEXT,
+    config_name TEXT,
+    FOREIGN KEY(config_id) REFERENCES configurations(id)
+);
+"""
+)
+
+# 索引语句，在旧数据库结构迁移完成后执行
+_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_call_details_timestamp ON call_details(timestamp);
+CREATE INDEX IF NOT EXISTS idx_minute_stats_start_time ON minute_stats(start_time);
+-- 按配置再按时间范围查询时走复合索引，单列config_id索引因此多余
+CREATE INDEX IF NOT EXISTS idx_call_details_cfg_ts ON call_details(config_id, timestamp);
+-- minute_stats的复合索引附带多日对比所需的汇总列，查询只读索引不回表
+CREATE INDEX IF NOT EXISTS idx_minute_stats_cfg_time ON minute_stats(
+    config_id, start_time, avg_response_time, success_count, call_count
+);
+DROP INDEX IF EXISTS idx_call_details_config_id;
+DROP INDEX IF EXISTS idx_minute_stats_config_id;
+DROP INDEX IF EXISTS idx_minute_stats_cfg_start;
+-- 部分索引只包含未解决的告警，规模与活跃告警数成正比
+CREATE INDEX IF NOT EXISTS idx_alerts_active
+    ON alerts(config_id, timestamp DESC) WHERE resolved = 0;
+-- 报告按天取告警、清理按时间删除已解决告警时使用的时间范围索引
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp);
+"""
 
 
 def init_db():
-    """初始化数据库结构"""
-    db_path = get_setting("DB_PATH")
+    """初始化数据库结构，同时重新读取DB_PATH配置"""
+    reset_db_path_cache()
+    db_path = _db_path()
     db_dir = os.path.dirname(db_path)
 
     # 确保数据库目录存在
     if db_dir and not os.path.exists(db_dir):
         os.makedirs(db_dir)
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    with writer_conn() as conn:
+        # WAL模式持久化在数据库文件中，读取(如生成报告)与写入互不阻塞
+        if db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
 
-        # 创建配置表
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS configurations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            url TEXT NOT NULL,
-            method TEXT NOT NULL,
-            headers TEXT,
-            payload TEXT,
-            call_interval INTEGER DEFAULT 5,
-            calls_per_batch INTEGER DEFAULT 5,
-            timeout INTEGER DEFAULT 10,
-            alert_threshold REAL DEFAULT 2.0,
-            is_active INTEGER DEFAULT 1,
-            monitoring_hours TEXT DEFAULT '0-23',
-            created_at TEXT,
-            updated_at TEXT
-        )
-        """)
-
-        # 创建调用详情表
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS call_details (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            response_time REAL,
-            status_code INTEGER,
-            error_message TEXT,
-            config_id INTEGER,
-            FOREIGN KEY(config_id) REFERENCES configurations(id)
-        )
-        """)
-
-        # 创建统计数据表
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS minute_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            start_time TEXT,
-            end_time TEXT,
-            avg_response_time REAL,
-            max_response_time REAL,
-            min_response_time REAL,
-            call_count INTEGER,
-            success_count INTEGER,
-            config_id INTEGER,
-            FOREIGN KEY(config_id) REFERENCES configurations(id)
-        )
-        """)
-
-        # 创建告警表
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alerts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            config_id INTEGER,
-            timestamp TEXT,
-            type TEXT,
-            message TEXT,
-            resolved INTEGER DEFAULT 0,
-            resolved_at TEXT,
-            FOREIGN KEY(config_id) REFERENCES configurations(id)
-        )
-        """)
-
-        # 创建索引
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_call_details_timestamp ON call_details(timestamp)"
-        )
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_call_details_config_id ON call_details(config_id)"
-        )
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_minute_stats_start_time ON minute_stats(start_time)"
-        )
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_minute_stats_config_id ON minute_stats(config_id)"
-        )
+        conn.executescript(_SCHEMA_SQL)
 
+        cursor = conn.cursor()
+        _migrate_call_details_epoch_ms(cursor)
+        _migrate_alerts_config_name(cursor)
         conn.commit()
 
-    logger.info("数据库初始化完成")
+        conn.executescript(_INDEX_SQL)
+
+    _name_for.cache_clear()
+    logger.debug("数据库初始化完成")
+
+
+def _migrate_call_details_epoch_ms(cursor: sqlite3.Cursor):
+    """将旧数据库call_details.timestamp由ISO文本转换为毫秒时间戳
+
+    TEXT亲和性的列会把写入的整数转成文本，因此需要重建表而不能只更新数据。
+    旧数据保存的是不带时区的本地时间，转换按首次执行init_db的进程所在时区(TZ)
+    解释，应在与监控进程相同的时区下完成迁移
+    """
+    columns = {
+        row["name"]: row["type"]
+        for row in cursor.execute("PRAGMA table_info(call_details)")
+    }
+    if columns.get("timestamp", "").upper() != "TEXT":
+        return
+
+    logger.info("正在将调用详情时间戳转换为毫秒时间戳...")
+    cursor.executescript(
+        """
+        BEGIN;
+        ALTER TABLE call_details RENAME TO call_details_old;
+        """
+        + _CALL_DETAILS_TABLE
+        + """
+        INSERT INTO call_details
+            (id, timestamp, response_time, status_code, error_message, config_id)
+        SELECT id,
+            CAST(round((julianday(timestamp, 'utc') - 2440587.5) * 86400000)
+                AS INTEGER),
+            response_time, status_code, error_message, config_id
+        FROM call_details_old;
+        DROP TABLE call_details_old;
+        COMMIT;
+        """
+    )
+
+
+def _migrate_alerts_config_name(cursor: sqlite3.Cursor):
+    """为旧数据库的告警表补充config_name列并回填"""
+    columns = {row["name"] for row in cursor.execute("PRAGMA table_info(alerts)")}
+    if "config_name" in columns:
+        return
+
+    cursor.execute("ALTER TABLE alerts ADD COLUMN config_name TEXT")
+    cursor.execute("""UPDATE alerts SET config_name =
+        (SELECT name FROM configurations WHERE id = alerts.config_id)""")
+    # 配置已删除的告警原先因JOIN不会显示，迁移后直接标记为已解决
+    cursor.execute(
+        """UPDATE alerts SET resolved = 1, resolved_at = ?
+        WHERE resolved = 0 AND config_name IS NULL""",
+        (_now_text(),),
+    )
 
 
 # 配置相关操作
+# save_configuration写入的内容列，与这些列全部相同的保存不改写数据页
+_CONFIG_CONTENT = (
+    "(url, method, headers, payload, call_interval, calls_per_batch, timeout, "
+    "alert_threshold, monitoring_hours, is_active)"
+)
+_CONFIG_EXCLUDED = (
+    "(excluded.url, excluded.method, excluded.headers, excluded.payload, "
+    "excluded.call_interval, excluded.calls_per_batch, excluded.timeout, "
+    "excluded.alert_threshold, excluded.monitoring_hours, excluded.is_active)"
+)
+_UNCHANGED = "跳过未变化的"
+
+
 def save_configuration(config: Configuration) -> Tuple[int, str]:
-    """保存配置到数据库"""
-    with get_connection() as conn:
+    """保存配置到数据库，已有ID时按ID更新，否则按名称插入或更新
+
+    内容与数据库中完全相同时不执行更新，避免重复保存产生WAL写入
+    """
+    values = (
+        config.url,
+        config.method,
+        config.headers_json,
+        config.payload,
+        config.call_interval,
+        config.calls_per_batch,
+        config.timeout,
+        config.alert_threshold,
+        config.monitoring_hours,
+        1 if config.is_active else 0,
+    )
+
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
-        # 检查是否已存在
         if config.id:
-            cursor.execute("SELECT id FROM configurations WHERE id = ?", (config.id,))
-        else:
-            cursor.execute(
-                "SELECT id FROM configurations WHERE name = ?", (config.name,)
-            )
-
-        existing = cursor.fetchone()
-        action = "更新" if existing else "创建"
-
-        if existing:
-            # 更新
             cursor.execute(
-                """UPDATE configurations 
+                f"""UPDATE configurations 
                 SET url = ?, method = ?, headers = ?, payload = ?, 
                     call_interval = ?, calls_per_batch = ?, timeout = ?,
                     alert_threshold = ?, monitoring_hours = ?, 
                     is_active = ?, updated_at = ?
-                WHERE id = ?""",
-                (
-                    config.url,
-                    config.method,
-                    config.headers_json,
-                    config.payload,
-                    config.call_interval,
-                    config.calls_per_batch,
-                    config.timeout,
-                    config.alert_threshold,
-                    config.monitoring_hours,
-                    1 if config.is_active else 0,
-                    config.updated_at,
-                    existing["id"],
-                ),
+                WHERE id = ? AND {_CONFIG_CONTENT} IS NOT
+                    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (*values, config.updated_at, config.id, *values),
             )
-            config_id = existing["id"]
-        else:
-            # 创建
-            cursor.execute(
-                """INSERT INTO configurations
-                (name, url, method, headers, payload, 
-                call_interval, calls_per_batch, timeout, 
-                alert_threshold, monitoring_hours, is_active, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    config.name,
-                    config.url,
-                    config.method,
-                    config.headers_json,
-                    config.payload,
-                    config.call_interval,
-                    config.calls_per_batch,
-                    config.timeout,
-                    config.alert_threshold,
-                    config.monitoring_hours,
-                    1 if config.is_active else 0,
-                    config.created_at,
-                    config.updated_at,
-                ),
-            )
-            config_id = cursor.lastrowid
+            if cursor.rowcount:
+                conn.commit()
+                return config.id, "更新"
+            if cursor.execute(
+                "SELECT 1 FROM configurations WHERE id = ?", (config.id,)
+            ).fetchone():
+                return config.id, _UNCHANGED
+
+        # 一条UPSERT语句完成插入或按名称更新，created_at只在插入时写入，
+        # 返回值与传入值相同即说明是新建；内容未变化时不更新也不返回行
+        row = cursor.execute(
+            f"""INSERT INTO configurations
+            (url, method, headers, payload, 
+            call_interval, calls_per_batch, timeout, 
+            alert_threshold, monitoring_hours, is_active, updated_at,
+            name, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                url = excluded.url, method = excluded.method,
+                headers = excluded.headers, payload = excluded.payload,
+                call_interval = excluded.call_interval,
+                calls_per_batch = excluded.calls_per_batch,
+                timeout = excluded.timeout,
+                alert_threshold = excluded.alert_threshold,
+                monitoring_hours = excluded.monitoring_hours,
+                is_active = excluded.is_active, updated_at = excluded.updated_at
+            WHERE {_CONFIG_CONTENT} IS NOT {_CONFIG_EXCLUDED}
+            RETURNING id, created_at""",
+            (*values, config.updated_at, config.name, config.created_at),
+        ).fetchone()
+
+        if row is None:
+            row = cursor.execute(
+                "SELECT id FROM configurations WHERE name = ?", (config.name,)
+            ).fetchone()
+            return row["id"], _UNCHANGED
 
         conn.commit()
-        return config_id, action
+        action = "创建" if row["created_at"] == config.created_at else "更新"
+        return row["id"], action
 
 
 def get_configuration(
     config_id: int = None, name: str = None
 ) -> Optional[Configuration]:
     """获取配置"""
-    with get_connection() as conn:
+    with reader_conn() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = _config_factory
 
         if config_id:
-            cursor.execute("SELECT * FROM configurations WHERE id = ?", (config_id,))
+            cursor.execute(_SQL_CONFIG_BY_ID, (config_id,))
         elif name:
-            cursor.execute("SELECT * FROM configurations WHERE name = ?", (name,))
+            cursor.execute(_SQL_CONFIG_BY_NAME, (name,))
         else:
             raise ValueError("Must provide either config_id or name")
 
-        row = cursor.fetchone()
-        return Configuration.from_row(row) if row else None
+        return cursor.fetchone()
 
 
 def get_all_configurations(active_only: bool = False) -> List[Configuration]:
     """获取所有配置"""
-    with get_connection() as conn:
+    with reader_conn() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = _config_factory
 
         if active_only:
-            cursor.execute(
-                "SELECT * FROM configurations WHERE is_active = 1 ORDER BY name"
-            )
+            cursor.execute(_SQL_ACTIVE_CONFIGS)
         else:
-            cursor.execute("SELECT * FROM configurations ORDER BY name")
+            cursor.execute(_SQL_ALL_CONFIGS)
 
-        rows = cursor.fetchall()
-        return [Configuration.from_row(row) for row in rows]
+        return cursor.fetchall()
+
+
+def get_configurations_by_ids(ids: List[int]) -> List[Configuration]:
+    """按ID批量获取配置，结果保持传入ID的顺序，不存在的ID被忽略"""
+    if not ids:
+        return []
+
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = _config_factory
+        placeholders = ",".join("?" * len(ids))
+        cursor.execute(f"{_SQL_SELECT_CONFIG} WHERE id IN ({placeholders})", list(ids))
+
+        by_id = {config.id: config for config in cursor.fetchall()}
+        return [by_id[config_id] for config_id in ids if config_id in by_id]
 
 
 def delete_configuration(config_id: int = None, name: str = None) -> bool:
-    """删除配置"""
-    with get_connection() as conn:
+    """删除配置，该配置未解决的告警同时标记为已解决"""
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         if config_id:
-            cursor.execute("DELETE FROM configurations WHERE id = ?", (config_id,))
+            where, param = "id = ?", config_id
         elif name:
-            cursor.execute("DELETE FROM configurations WHERE name = ?", (name,))
+            where, param = "name = ?", name
         else:
             raise ValueError("Must provide either config_id or name")
 
+        cursor.execute(
+            f"""UPDATE alerts SET resolved = 1, resolved_at = ?
+            WHERE resolved = 0 AND config_id IN
+            (SELECT id FROM configurations WHERE {where})""",
+            (_now_text(), param),
+        )
+        cursor.execute(f"DELETE FROM configurations WHERE {where}", (param,))
+
         success = cursor.rowcount > 0
         conn.commit()
-        return success
+
+    _name_for.cache_clear()
+    return success
 
 
 def toggle_configuration(
     config_id: int = None, name: str = None, active: bool = True
 ) -> bool:
     """启用/禁用配置"""
-    with get_connection() as conn:
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         if config_id:
@@ -280,13 +535,11 @@ def toggle_configuration(
 # 调用详情和统计相关操作
 def save_call_detail(call_detail: CallDetail) -> int:
     """保存调用详情"""
-    with get_connection() as conn:
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         cursor.execute(
-            """INSERT INTO call_details 
-            (timestamp, response_time, status_code, error_message, config_id)
-            VALUES (?, ?, ?, ?, ?)""",
+            _SQL_INSERT_CALL,
             (
                 call_detail.timestamp,
                 call_detail.response_time,
@@ -300,16 +553,107 @@ def save_call_detail(call_detail: CallDetail) -> int:
         return cursor.lastrowid
 
 
+def _call_rows(call_details: List[CallDetail]) -> List[tuple]:
+    """按_SQL_INSERT_CALL的参数顺序展开调用详情"""
+    return [
+        (
+            d.timestamp,
+            d.response_time,
+            d.status_code,
+            d.error_message,
+            d.config_id,
+        )
+        for d in call_details
+    ]
+
+
+def save_call_details(call_details: List[CallDetail]):
+    """在一个事务中批量保存调用详情"""
+    if not call_details:
+        return
+
+    with writer_conn() as conn:
+        conn.executemany(_SQL_INSERT_CALL, _call_rows(call_details))
+
+        conn.commit()
+
+
+def enqueue_call_details(call_details: List[CallDetail]):
+    """将调用详情交给后台写入线程，不等待写入完成
+
+    后台线程把一段时间内各调用线程提交的数据合并到一个事务中提交，
+    需要确保数据已落库时调用flush_call_details
+    """
+    if not call_details:
+        return
+
+    _ensure_flusher()
+    _call_queue.put(_call_rows(call_details))
+
+
+def flush_call_details():
+    """阻塞直到已入队的调用详情全部写入数据库"""
+    _call_queue.join()
+
+
+def _ensure_flusher():
+    """首次入队时启动后台写入线程"""
+    global _flusher
+    if _flusher is not None:
+        return
+
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop, name="call-details-flusher", daemon=True
+            )
+            _flusher.start()
+            # 守护线程随解释器退出而终止，退出前写完队列中剩余的数据
+            atexit.register(flush_call_details)
+
+
+def _drain_call_queue() -> Tuple[List[tuple], int]:
+    """阻塞等待第一批数据，随后在限定时间内继续收集，直到达到行数上限
+
+    返回收集到的行及取出的队列条目数
+    """
+    rows = list(_call_queue.get())
+    taken = 1
+    deadline = time.monotonic() + _CALL_BATCH_MAX_WAIT
+    while len(rows) < _CALL_BATCH_MAX_ROWS:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            rows.extend(_call_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+        taken += 1
+    return rows, taken
+
+
+def _flush_loop():
+    """后台写入线程主循环：每批数据一个事务、一次提交"""
+    while True:
+        rows, taken = _drain_call_queue()
+        try:
+            with writer_conn() as conn:
+                conn.executemany(_SQL_INSERT_CALL, rows)
+                conn.commit()
+        except Exception as e:
+            logger.exception(f"批量写入 {len(rows)} 条调用详情时出错: {str(e)}")
+        finally:
+            for _ in range(taken):
+                _call_queue.task_done()
+
+
 def save_minute_stats(stats: MinuteStats) -> int:
     """保存分钟统计数据"""
-    with get_connection() as conn:
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         cursor.execute(
-            """INSERT INTO minute_stats 
-            (start_time, end_time, avg_response_time, max_response_time, 
-            min_response_time, call_count, success_count, config_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            _SQL_INSERT_STATS,
             (
                 stats.start_time,
                 stats.end_time,
@@ -326,44 +670,97 @@ def save_minute_stats(stats: MinuteStats) -> int:
         return cursor.lastrowid
 
 
+def save_minute_stats_bulk(stats_list: List[MinuteStats]):
+    """在一个事务中批量保存分钟统计数据"""
+    if not stats_list:
+        return
+
+    with writer_conn() as conn:
+        conn.executemany(
+            _SQL_INSERT_STATS,
+            [
+                (
+                    stats.start_time,
+                    stats.end_time,
+                    stats.avg_response_time,
+                    stats.max_response_time,
+                    stats.min_response_time,
+                    stats.call_count,
+                    stats.success_count,
+                    stats.config_id,
+                )
+                for stats in stats_list
+            ],
+        )
+
+        conn.commit()
+
+
+@functools.lru_cache(maxsize=1024)
+def _name_for(config_id: int) -> Optional[str]:
+    """配置ID到名称的映射，配置名称创建后不再修改，可以长期缓存"""
+    with reader_conn() as conn:
+        row = conn.execute(
+            "SELECT name FROM configurations WHERE id = ?", (config_id,)
+        ).fetchone()
+        return row["name"] if row else None
+
+
 def create_alert(config_id: int, alert_type: AlertType, message: str) -> int:
     """创建告警"""
-    with get_connection() as conn:
+    config_name = _name_for(config_id)
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         cursor.execute(
-            """INSERT INTO alerts 
-            (config_id, timestamp, type, message)
-            VALUES (?, ?, ?, ?)""",
-            (config_id, datetime.datetime.now().isoformat(), alert_type.value, message),
+            _SQL_INSERT_ALERT,
+            (
+                config_id,
+                _now_text(),
+                alert_type.value,
+                message,
+                config_name,
+            ),
         )
 
         conn.commit()
         return cursor.lastrowid
 
 
+def create_alerts(alerts: List[Tuple[int, AlertType, str]]):
+    """在一个事务中批量创建告警，每项为(配置ID, 告警类型, 消息)"""
+    if not alerts:
+        return
+
+    timestamp = _now_text()
+    with writer_conn() as conn:
+        conn.executemany(
+            _SQL_INSERT_ALERT,
+            [
+                (config_id, timestamp, alert_type.value, message, _name_for(config_id))
+                for config_id, alert_type, message in alerts
+            ],
+        )
+
+        conn.commit()
+
+
 def get_active_alerts(config_id: int = None) -> List[Alert]:
     """获取活跃告警"""
-    with get_connection() as conn:
+    with reader_conn() as conn:
         cursor = conn.cursor()
 
         if config_id:
             cursor.execute(
-                """SELECT a.*, c.name as config_name
-                FROM alerts a
-                JOIN configurations c ON a.config_id = c.id
-                WHERE a.resolved = 0 AND a.config_id = ?
-                ORDER BY a.timestamp DESC""",
+                """SELECT * FROM alerts
+                WHERE resolved = 0 AND config_id = ?
+                ORDER BY timestamp DESC""",
                 (config_id,),
             )
         else:
-            cursor.execute(
-                """SELECT a.*, c.name as config_name
-                FROM alerts a
-                JOIN configurations c ON a.config_id = c.id
-                WHERE a.resolved = 0
-                ORDER BY a.timestamp DESC"""
-            )
+            cursor.execute("""SELECT * FROM alerts
+                WHERE resolved = 0
+                ORDER BY timestamp DESC""")
 
         rows = cursor.fetchall()
         return [
@@ -383,14 +780,14 @@ def get_active_alerts(config_id: int = None) -> List[Alert]:
 
 def resolve_alert(alert_id: int) -> bool:
     """解决告警"""
-    with get_connection() as conn:
+    with writer_conn() as conn:
         cursor = conn.cursor()
 
         cursor.execute(
             """UPDATE alerts 
             SET resolved = 1, resolved_at = ? 
             WHERE id = ?""",
-            (datetime.datetime.now().isoformat(), alert_id),
+            (_now_text(), alert_id),
         )
 
         success = cursor.rowcount > 0
@@ -398,42 +795,116 @@ def resolve_alert(alert_id: int) -> bool:
         return success
 
 
-def cleanup_old_data(days_to_keep: int = 30) -> Tuple[int, int, int]:
-    """清理旧数据"""
-    cutoff_date = (
-        datetime.datetime.now() - datetime.timedelta(days=days_to_keep)
-    ).isoformat()
+def cleanup_old_data(
+    days_to_keep: int = 30,
+    chunk_size: int = 10000,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> Tuple[int, int, int]:
+    """清理旧数据
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    按批次删除并逐批提交，避免长时间持有写锁阻塞监控写入。
+    progress回调在每批删除后以(表名, 本批删除行数)调用。
+    """
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days_to_keep)
+    cutoff_date = cutoff.isoformat()
 
-        cursor.execute("DELETE FROM call_details WHERE timestamp < ?", (cutoff_date,))
-        call_details_count = cursor.rowcount
+    targets = [
+        ("call_details", "timestamp < ?", _epoch_ms(cutoff)),
+        ("minute_stats", "start_time < ?", cutoff_date),
+        ("alerts", "resolved = 1 AND timestamp < ?", cutoff_date),
+    ]
+    counts = []
 
-        cursor.execute("DELETE FROM minute_stats WHERE start_time < ?", (cutoff_date,))
-        minute_stats_count = cursor.rowcount
+    for table, condition, cutoff_value in targets:
+        total = 0
+        while True:
+            # 每批单独获取写连接，批次之间让出给监控线程写入
+            with writer_conn() as conn:
+                cursor = conn.execute(
+                    f"""DELETE FROM {table} WHERE rowid IN
+                    (SELECT rowid FROM {table} WHERE {condition} LIMIT ?)""",
+                    (cutoff_value, chunk_size),
+                )
+                deleted = cursor.rowcount
+                conn.commit()
 
-        cursor.execute(
-            "DELETE FROM alerts WHERE resolved = 1 AND timestamp < ?", (cutoff_date,)
-        )
-        alerts_count = cursor.rowcount
+            total += deleted
+            if progress and deleted:
+                progress(table, deleted)
+            if deleted < chunk_size:
+                break
 
-        conn.commit()
+        counts.append(total)
+
+    # 大量删除后截断WAL文件，并让SQLite按需更新查询规划统计信息
+    with writer_conn() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    optimize_db()
 
-    return call_details_count, minute_stats_count, alerts_count
+    return tuple(counts)
+
+
+def _now_text() -> str:
+    """当前时间的ISO文本
+
+    告警表的时间列仍为TEXT，迁移为毫秒时间戳之前统一经此生成，
+    call_details等已迁移的表使用time.time_ns() // 1_000_000
+    """
+    return datetime.datetime.now().isoformat()
+
+
+def _epoch_ms(dt: datetime.datetime) -> int:
+    """本地时间转换为毫秒级Unix时间戳"""
+    return int(dt.timestamp() * 1000)
+
+
+def day_range_ms(date) -> Tuple[int, int]:
+    """返回某天的半开区间[当天0点, 次日0点)的毫秒时间戳，用于call_details"""
+    start = datetime.datetime.combine(date, datetime.time())
+    return _epoch_ms(start), _epoch_ms(start + datetime.timedelta(days=1))
+
+
+def day_range(date) -> Tuple[str, str]:
+    """返回某天的半开区间[当天0点, 次日0点)的ISO时间字符串
+
+    ISO-8601字符串的字典序与时间顺序一致，按区间比较可以直接走时间列索引，
+    而date(列) = ?需要对每行求值
+    """
+    next_day = date + datetime.timedelta(days=1)
+    return f"{date.isoformat()}T00:00:00", f"{next_day.isoformat()}T00:00:00"
+
+
+def optimize_db():
+    """执行PRAGMA optimize，让SQLite按需更新查询规划所用的统计信息"""
+    with writer_conn() as conn:
+        conn.execute("PRAGMA optimize")
+
+
+def _stats_frame(rows):
+    """由minute_stats元组构建DataFrame，并按_STATS_DTYPES指定列类型"""
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(rows, columns=list(_STATS_DTYPES))
+    return df.astype(_STATS_DTYPES)
 
 
 def get_stats_for_report(date, config_id=None):
-    """获取生成报告所需的统计数据，确保按分钟排序"""
-    with get_connection() as conn:
-        query = "SELECT * FROM minute_stats WHERE date(start_time) = ?"
-        params = [date.isoformat()]
+    """获取生成报告所需的统计数据，确保按分钟排序
 
-        if config_id:
-            query += " AND config_id = ?"
-            params.append(config_id)
+    直接取元组构建DataFrame，并按_STATS_DTYPES指定列类型
+    """
+    query = _SQL_SELECT_STATS + " WHERE start_time >= ? AND start_time < ?"
+    params = list(day_range(date))
 
-        # 确保按时间排序
-        query += " ORDER BY start_time ASC"
+    if config_id:
+        query += " AND config_id = ?"
+        params.append(config_id)
 
-        return pd.read_sql_query(query, conn, params=params)
+    # 确保按时间排序
+    query += " ORDER BY start_time ASC"
+
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        # 返回普通元组，省去sqlite3.Row的逐行包装
+        cursor.row_factory = None
+        return _stats_frame(cursor.execute(query, params).fetchall())
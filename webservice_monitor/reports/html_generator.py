@@ -5,38 +5,198 @@ HTML报告生成
 import os
 import logging
 import datetime
-from typing import Dict, List, Optional, Any
+import json
+import shutil
+import hashlib
+import time
+import tempfile
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from jinja2 import Environment, FileSystemLoader
+import matplotlib
+
+# 报告只输出PNG文件，显式使用非交互式Agg后端
+matplotlib.use("Agg")
+from matplotlib import style as mstyle
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 import numpy as np
 import matplotlib.dates as mdates
+import matplotlib.colors as mcolors
+
+try:
+    from statsmodels.nonparametric.smoothers_lowess import lowess as _lowess
+except ImportError:
+    _lowess = None
 
 from webservice_monitor.db import repository
-from webservice_monitor.utils.config import get_setting
+from webservice_monitor.utils.config import SETTINGS
 from webservice_monitor.db.models import Configuration
 
 logger = logging.getLogger(__name__)
 
+# 简化折线路径并分块绘制，减少数千个分钟数据点的栅格化工作量
+matplotlib.rcParams.update(
+    {
+        "path.simplify": True,
+        "path.simplify_threshold": 1.0,
+        "agg.path.chunksize": 10000,
+    }
+)
+# start_time为isoformat()生成的文本，微秒为0时省略小数部分；
+# pandas 2.0起按ISO8601解析才能兼容两种写法，旧版本自动推断即可
+_ISO_FORMAT = "ISO8601" if int(pd.__version__.split(".")[0]) >= 2 else None
+# 图表文件较小，用最低压缩级别换取更快的PNG编码
+_PNG_OPTIONS = {"compress_level": 1}
+
+# 状态码类别(status_code / 100，其他状态码为0)及其饼图标签
+_STATUS_CLASSES = ((2, "2xx"), (3, "3xx"), (4, "4xx"), (5, "5xx"), (0, "other"))
+
+# 报告计算使用的窄数值类型：每分钟调用数远小于2^31，响应时间只需毫秒级精度，
+# 减半后分组汇总、平滑和绘图处理的数据量也减半
+_REPORT_DTYPES = {
+    "avg_response_time": "float32",
+    "max_response_time": "float32",
+    "min_response_time": "float32",
+    "call_count": "int32",
+    "success_count": "int32",
+    "config_id": "Int32",
+}
+
+# 各配置依次使用的颜色，预先转换为RGBA数组，绘图时不再逐次解析十六进制字符串
+_PALETTE = mcolors.to_rgba_array(
+    [
+        "#1f77b4",
+        "#ff7f0e",
+        "#2ca02c",
+        "#d62728",
+        "#9467bd",
+        "#8c564b",
+        "#e377c2",
+        "#7f7f7f",
+        "#bcbd22",
+        "#17becf",
+    ]
+)
+
+# 数据点过少时代替全部图表嵌入报告的占位图
+_CHART_PLACEHOLDER = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="600" height="80">'
+    '<rect width="600" height="80" rx="4" fill="#f8f9fa" stroke="#dee2e6"/>'
+    '<text x="300" y="45" text-anchor="middle" font-size="14" fill="#6c757d">'
+    "当天仅有{count}条统计数据，未生成图表</text></svg>"
+)
+
+# 0-23点所属的雷达图时段（轴索引）：0-5点凌晨为4，6-8点为0，9-11点为1，
+# 12-17点为2，18-23点为3
+_HOUR_PERIODS = np.repeat([4, 0, 1, 2, 3], [6, 3, 3, 6, 6])
+# 雷达图各轴（早上、上午、下午、晚上、凌晨）的标签和角度，角度末尾重复第一个以闭合图形
+_RADAR_CATEGORIES = (
+    "morning (6-9am)",
+    "morning (9-12am)",
+    "afternoon (12-18pm)",
+    "evening (18-24pm)",
+    "night (0-6am)",
+)
+_RADAR_ANGLES = np.append(
+    np.linspace(0, 2 * np.pi, len(_RADAR_CATEGORIES), endpoint=False), 0.0
+)
+
+# 图表缓存目录中记录图表路径的文件
+_CHARTS_MANIFEST = "charts.json"
+# 被中断的生成留下的临时目录超过此时间(秒)后清理，未超时的可能仍在生成中
+_STALE_TMP_SECONDS = 3600
+
+# 每日对比图包含的天数
+_COMPARISON_DAYS = 7
+
+
+def _new_figure(**kwargs) -> Figure:
+    """创建不受pyplot管理的图形并绑定Agg画布，函数返回后即可被回收"""
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save_figure(fig: Figure, path: str):
+    """将图形保存为PNG文件"""
+    fig.savefig(path, dpi=100, pil_kwargs=_PNG_OPTIONS)
+
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "../config/templates")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_env() -> Environment:
+    """进程内共享的模板环境，编译结果缓存在内存和临时目录的字节码缓存中"""
+    return Environment(
+        loader=FileSystemLoader(_TEMPLATE_DIR),
+        auto_reload=False,
+        bytecode_cache=FileSystemBytecodeCache(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_template(name: str):
+    """获取已编译的模板，重复生成报告时不再解析和编译"""
+    return _get_env().get_template(name)
+
+
+# 报告模板使用的告警字段，与_prepare_report_data中告警查询的列顺序一致
+_ALERT_KEYS = (
+    "id",
+    "timestamp",
+    "config_name",
+    "type",
+    "message",
+    "resolved",
+    "resolved_at",
+)
+
+
+def _alert_factory(cursor, row) -> Dict[str, Any]:
+    """行工厂：告警查询结果直接构造为模板使用的字典"""
+    alert = dict(zip(_ALERT_KEYS, row))
+    alert["resolved"] = bool(alert["resolved"])
+    return alert
+
 
 class HTMLReportGenerator:
     """HTML报告生成器"""
 
     def __init__(self):
         """初始化报告生成器"""
-        template_dir = os.path.join(os.path.dirname(__file__), "../config/templates")
-        self.env = Environment(loader=FileSystemLoader(template_dir))
-        self.report_dir = get_setting("REPORT_DIR", "reports")
+        self.env = _get_env()
+        self.report_dir = SETTINGS.REPORT_DIR
 
         # 确保报告目录存在
         if not os.path.exists(self.report_dir):
             os.makedirs(self.report_dir)
 
+    def __getstate__(self):
+        # 并行生成图表时实例随方法传给子进程，模板环境在子进程中按需重新获取
+        state = self.__dict__.copy()
+        state.pop("env", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.env = _get_env()
+
     def generate_report(
         self, date: datetime.date, config_id: Optional[int] = None
     ) -> str:
         """生成HTML报告并返回文件路径"""
+        return self.render_report(date, config_id)[0]
+
+    def render_report(
+        self, date: datetime.date, config_id: Optional[int] = None
+    ) -> Tuple[str, str]:
+        """生成HTML报告，返回(文件路径, HTML内容)"""
         # 获取报告数据
         data = self._prepare_report_data(date, config_id)
 
@@ -44,7 +204,7 @@ class HTMLReportGenerator:
         charts = self._generate_charts(data, date, config_id)
 
         # 渲染HTML模板
-        template = self.env.get_template("report_template.html")
+        template = _get_template("report_template.html")
         html_content = template.render(
             title=data["title"],
             date=date.strftime("%Y-%m-%d"),
@@ -69,7 +229,7 @@ class HTMLReportGenerator:
             f.write(html_content)
 
         logger.info(f"已生成HTML报告: {report_path}")
-        return report_path
+        return report_path, html_content
 
     def _prepare_report_data(
         self, date: datetime.date, config_id: Optional[int] = None
@@ -89,18 +249,21 @@ class HTMLReportGenerator:
         # 获取统计数据
         stats_df = repository.get_stats_for_report(date, config_id)
 
-        # 确保datetime列可用于分钟级别聚合
+        # 确保datetime列可用于分钟级别聚合，hour列供各小时图表分组
         if not stats_df.empty:
-            stats_df["datetime"] = pd.to_datetime(stats_df["start_time"])
+            stats_df = stats_df.astype(_REPORT_DTYPES)
+            start_time = stats_df["start_time"]
+            if not pd.api.types.is_datetime64_any_dtype(start_time):
+                start_time = pd.to_datetime(start_time, format=_ISO_FORMAT, cache=True)
+            stats_df["datetime"] = start_time
+            stats_df["hour"] = stats_df["datetime"].dt.hour
 
-        # 计算汇总信息
+        # 计算汇总信息，调用量和成功数各只求和一次
+        total_calls = stats_df["call_count"].sum() if not stats_df.empty else 0
+        total_success = stats_df["success_count"].sum() if not stats_df.empty else 0
         summary = {
-            "total_calls": stats_df["call_count"].sum() if not stats_df.empty else 0,
-            "success_rate": (
-                stats_df["success_count"].sum() / stats_df["call_count"].sum() * 100
-            )
-            if not stats_df.empty and stats_df["call_count"].sum() > 0
-            else 0,
+            "total_calls": total_calls,
+            "success_rate": total_success / total_calls * 100 if total_calls > 0 else 0,
             "avg_response_time": stats_df["avg_response_time"].mean()
             if not stats_df.empty
             else 0,
@@ -111,17 +274,18 @@ class HTMLReportGenerator:
             "date": date.strftime("%Y-%m-%d"),
         }
 
-        # 获取告警数据
-        alerts = []
-        with repository.get_connection() as conn:
+        # 获取告警数据，只查询模板需要的列
+        with repository.reader_conn() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = _alert_factory
             query = """
-            SELECT a.*, c.name as config_name
+            SELECT a.id, a.timestamp, c.name, a.type, a.message,
+                a.resolved, a.resolved_at
             FROM alerts a
             JOIN configurations c ON a.config_id = c.id
-            WHERE date(a.timestamp) = ?
+            WHERE a.timestamp >= ? AND a.timestamp < ?
             """
-            params = [date.isoformat()]
+            params = list(repository.day_range(date))
 
             if config_id:
                 query += " AND a.config_id = ?"
@@ -129,49 +293,45 @@ class HTMLReportGenerator:
 
             query += " ORDER BY a.timestamp DESC"
 
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            alerts = cursor.execute(query, params).fetchall()
 
-            for row in rows:
-                alerts.append(
-                    {
-                        "id": row["id"],
-                        "timestamp": row["timestamp"],
-                        "config_name": row["config_name"],
-                        "type": row["type"],
-                        "message": row["message"],
-                        "resolved": bool(row["resolved"]),
-                        "resolved_at": row["resolved_at"],
-                    }
-                )
-
-        # 准备性能数据
+        # 准备性能数据，一次分组得到所有配置的汇总，再按配置ID查字典，
+        # 避免逐个配置用.loc取行(每次构造Series并把整数列上转为浮点)
         performance_data = []
-        for config in configs:
-            config_stats = (
-                stats_df[stats_df["config_id"] == config.id]
-                if not stats_df.empty
-                else pd.DataFrame()
+        per_config = (
+            stats_df.groupby("config_id")
+            .agg(
+                total_calls=("call_count", "sum"),
+                success_count=("success_count", "sum"),
+                avg_response_time=("avg_response_time", "mean"),
+                max_response_time=("max_response_time", "max"),
+                min_response_time=("min_response_time", "min"),
             )
+            .to_dict("index")
+            if not stats_df.empty
+            else {}
+        )
+        for config in configs:
+            totals = per_config.get(config.id)
+            if totals is None:
+                continue
 
-            if not config_stats.empty:
-                perf = {
+            performance_data.append(
+                {
                     "config_id": config.id,
                     "config_name": config.name,
                     "url": config.url,
-                    "total_calls": config_stats["call_count"].sum(),
+                    "total_calls": totals["total_calls"],
                     "success_rate": (
-                        config_stats["success_count"].sum()
-                        / config_stats["call_count"].sum()
-                        * 100
+                        totals["success_count"] / totals["total_calls"] * 100
                     )
-                    if config_stats["call_count"].sum() > 0
+                    if totals["total_calls"] > 0
                     else 0,
-                    "avg_response_time": config_stats["avg_response_time"].mean(),
-                    "max_response_time": config_stats["max_response_time"].max(),
-                    "min_response_time": config_stats["min_response_time"].min(),
+                    "avg_response_time": totals["avg_response_time"],
+                    "max_response_time": totals["max_response_time"],
+                    "min_response_time": totals["min_response_time"],
                 }
-                performance_data.append(perf)
+            )
 
         return {
             "title": title,
@@ -182,149 +342,326 @@ class HTMLReportGenerator:
             "stats_df": stats_df,
         }
 
+    @staticmethod
+    def _minute_series(stats_df: pd.DataFrame) -> Dict[int, tuple]:
+        """按配置和分钟聚合统计数据
+
+        返回{配置ID: (时间, 平均响应时间, 成功率)}，各项均为numpy数组，
+        时间为Matplotlib日期数值，不包含没有数据的分钟
+        """
+        agg = (
+            stats_df.groupby(["config_id", pd.Grouper(key="datetime", freq="1min")])
+            .agg(
+                avg_response_time=("avg_response_time", "mean"),
+                success_count=("success_count", "sum"),
+                call_count=("call_count", "sum"),
+            )
+            .dropna(subset=["avg_response_time"])
+        )
+
+        series = {}
+        for cid, minutes in agg.groupby(level="config_id"):
+            success_rates = (
+                minutes["success_count"].to_numpy()
+                / np.maximum(minutes["call_count"].to_numpy(), 1)
+                * 100
+            )
+            series[cid] = (
+                mdates.date2num(minutes.index.get_level_values("datetime").to_numpy()),
+                minutes["avg_response_time"].to_numpy(),
+                success_rates,
+            )
+        return series
+
+    @staticmethod
+    def _hourly_stats(stats_df: pd.DataFrame) -> pd.DataFrame:
+        """按(配置ID, 小时)一次分组汇总，各小时图表按配置ID取子表"""
+        hourly = stats_df.groupby(["config_id", "hour"]).agg(
+            avg_response_time=("avg_response_time", "mean"),
+            std_response_time=("avg_response_time", "std"),
+            max_response_time=("max_response_time", "max"),
+            success_count=("success_count", "sum"),
+            call_count=("call_count", "sum"),
+        )
+        calls = hourly["call_count"]
+        hourly["success_rate"] = (
+            hourly["success_count"] / calls.where(calls > 0) * 100
+        ).fillna(0)
+        return hourly
+
+    @staticmethod
+    def _config_rows(frame: pd.DataFrame, config_id: int) -> Optional[pd.DataFrame]:
+        """从以config_id为第一层索引的分组结果中取出某个配置的部分，没有数据时返回None"""
+        if config_id not in frame.index:
+            return None
+        return frame.xs(config_id, level="config_id")
+
+    def _plot_trend(self, ax, times, values, color: np.ndarray, name: str):
+        """绘制趋势线：数据点足够多时平滑处理，有statsmodels时使用LOWESS，否则使用滑动平均"""
+        if _lowess is not None:
+            if len(times) > 10:
+                smoothed = _lowess(values, np.arange(len(times)), frac=0.3)[:, 1]
+                label = f"{name} (smooth trend)"
+            else:
+                # 数据点较少时使用简单连线
+                smoothed, label = values, name
+        else:
+            window = min(5, len(values))
+            if window > 1:
+                smoothed = self._moving_average(values, window)
+                label = f"{name} (smooth trend)"
+            else:
+                # 数据点太少，直接连线
+                smoothed, label = values, name
+
+        ax.plot(times, smoothed, color=color, linestyle="-", linewidth=2.5, label=label)
+
+    @staticmethod
+    def _moving_average(values: np.ndarray, window: int) -> np.ndarray:
+        """滑动平均，开头不足一个窗口的点按已有数据求平均，结果与输入等长
+
+        用前缀和一次计算所有窗口的和，复杂度O(n)
+        """
+        sums = np.cumsum(values, dtype=np.float64)
+        sums[window:] = sums[window:] - sums[:-window]
+        return sums / np.minimum(np.arange(1, len(sums) + 1), window)
+
+    @staticmethod
+    def _scatter_points(ax, points: List[tuple]):
+        """将各配置的(时间, 数值, RGBA颜色)数据点合并为一个散点集合绘制"""
+        if not points:
+            return
+
+        # 每个配置的RGBA颜色按点数重复，得到与数据点等长的颜色数组
+        colors = np.repeat(
+            np.array([color for _, _, color in points]),
+            [len(times) for times, _, _ in points],
+            axis=0,
+        )
+        ax.scatter(
+            np.concatenate([times for times, _, _ in points]),
+            np.concatenate([values for _, values, _ in points]),
+            s=30,
+            c=colors,
+            alpha=0.6,
+        )
+
     def _generate_charts(
         self, data: Dict, date: datetime.date, config_id: Optional[int] = None
     ) -> Dict:
-        """生成报表图表"""
+        """生成报表图表
+
+        图表按统计数据内容缓存在charts/<chart_id>-<摘要>/目录中，
+        数据未变化时直接复用上次生成的图表
+        """
         stats_df = data["stats_df"]
-        charts = {}
 
         if stats_df.empty:
-            return charts
+            return {}
+
+        # 数据点很少时图表没有参考价值，跳过绘图和PNG编码，只嵌入占位图
+        if len(stats_df) < SETTINGS.CHART_MIN_POINTS:
+            return {"placeholder": _CHART_PLACEHOLDER.format(count=len(stats_df))}
 
         # 确保图表目录存在
-        charts_dir = os.path.join(self.report_dir, "charts")
-        if not os.path.exists(charts_dir):
-            os.makedirs(charts_dir)
+        charts_root = os.path.join(self.report_dir, "charts")
+        if not os.path.exists(charts_root):
+            os.makedirs(charts_root)
 
-        # 生成响应时间趋势图
         chart_id = f"response_time_{date.strftime('%Y%m%d')}"
         if config_id:
             chart_id += f"_{config_id}"
 
-        # 将时间字符串转换为datetime对象，便于按分钟分组
-        stats_df["datetime"] = pd.to_datetime(stats_df["start_time"])
+        digest = self._charts_digest(stats_df, data["configs"], date)
+        cache_name = f"{chart_id}-{digest}"
+        cache_dir = os.path.join(charts_root, cache_name)
+        manifest = os.path.join(cache_dir, _CHARTS_MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, encoding="utf-8") as f:
+                return json.load(f)
+
+        # 先生成到临时目录，完成后整体改名，其他进程不会读到不完整的缓存
+        tmp_dir = tempfile.mkdtemp(prefix=f".{cache_name}.", dir=charts_root)
+        try:
+            rendered = self._render_charts(data, date, chart_id, tmp_dir)
+            charts = {
+                name: os.path.join("charts", cache_name, os.path.basename(path))
+                if path
+                else None
+                for name, path in rendered.items()
+            }
+            with open(
+                os.path.join(tmp_dir, _CHARTS_MANIFEST), "w", encoding="utf-8"
+            ) as f:
+                json.dump(charts, f)
+            os.rename(tmp_dir, cache_dir)
+        except OSError:
+            # 其他进程已生成同一份缓存
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(manifest):
+                raise
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # 同一报告的旧图表已不再被引用；被中断的生成留下的临时目录超时后一并清理
+        stale_before = time.time() - _STALE_TMP_SECONDS
+        for name in os.listdir(charts_root):
+            path = os.path.join(charts_root, name)
+            if name.startswith(f".{chart_id}-"):
+                try:
+                    if os.path.getmtime(path) < stale_before:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+            elif name != cache_name and name.rpartition("-")[0] == chart_id:
+                shutil.rmtree(path, ignore_errors=True)
+
+        return charts
+
+    @staticmethod
+    def _charts_digest(
+        stats_df: pd.DataFrame, configs: List[Configuration], date: datetime.date
+    ) -> str:
+        """图表输入数据的内容摘要，用作图表缓存键
+
+        除当天统计数据和配置名称外，还包含每日对比图读取的多日分钟统计
+        和状态码分布图读取的当天调用详情的行数及最大ID
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(
+            pd.util.hash_pandas_object(stats_df, index=False).to_numpy().tobytes()
+        )
+        for config in configs:
+            digest.update(f"{config.id}:{config.name}\n".encode())
+
+        if configs:
+            placeholders = ", ".join("?" * len(configs))
+            config_ids = [config.id for config in configs]
+            start, _ = repository.day_range(
+                date - datetime.timedelta(days=_COMPARISON_DAYS - 1)
+            )
+            _, end = repository.day_range(date)
+            with repository.reader_conn() as conn:
+                for query, params in (
+                    (
+                        "SELECT COUNT(*), MAX(id) FROM minute_stats "
+                        "WHERE start_time >= ? AND start_time < ? "
+                        f"AND config_id IN ({placeholders})",
+                        (start, end, *config_ids),
+                    ),
+                    (
+                        "SELECT COUNT(*), MAX(id) FROM call_details "
+                        "WHERE timestamp >= ? AND timestamp < ? "
+                        f"AND config_id IN ({placeholders})",
+                        (*repository.day_range_ms(date), *config_ids),
+                    ),
+                ):
+                    count, max_id = conn.execute(query, params).fetchone()
+                    digest.update(f"{count}:{max_id}\n".encode())
+        return digest.hexdigest()
+
+    def _render_charts(
+        self, data: Dict, date: datetime.date, chart_id: str, charts_dir: str
+    ) -> Dict:
+        """在charts_dir中生成全部图表，返回图表名称到相对路径的映射"""
+        stats_df = data["stats_df"]
+        charts = {}
+
+        # 一次分组完成所有配置的分钟级和小时级聚合
+        minute_series = self._minute_series(stats_df)
+        hourly = self._hourly_stats(stats_df)
 
         # 设置更好的图表样式
-        plt.style.use("ggplot")
+        mstyle.use("ggplot")
+
+        # 新增：1. 响应时间分布热图、3. 性能趋势对比图、4. 可用性雷达图
+        # 只依赖已查询的数据，先提交到子进程中并行绘制和编码PNG
+        configs = data["configs"]
+        tasks = {
+            "response_time_heatmap": (
+                self._generate_response_time_heatmap,
+                (stats_df, date, chart_id, charts_dir, configs),
+            ),
+            "performance_comparison": (
+                self._generate_performance_comparison,
+                (hourly, date, chart_id, charts_dir, configs),
+            ),
+            "availability_radar": (
+                self._generate_availability_radar,
+                (hourly, date, chart_id, charts_dir, configs),
+            ),
+        }
+        with ProcessPoolExecutor(
+            max_workers=min(len(tasks), os.cpu_count() or 1),
+            initializer=mstyle.use,
+            initargs=("ggplot",),
+        ) as pool:
+            futures = {
+                name: pool.submit(method, *args)
+                for name, (method, args) in tasks.items()
+            }
+
+            # 其余图表在本进程中生成，与子进程同时进行
+            charts.update(
+                self._render_main_charts(
+                    data, date, chart_id, charts_dir, minute_series, hourly
+                )
+            )
+
+            # 新增：2. 状态码分布图
+            charts["status_code_chart"] = self._generate_status_code_chart(
+                data, date, chart_id, charts_dir
+            )
+
+            # 新增：5. 每日对比图（如果有历史数据）
+            charts["daily_comparison"] = self._generate_daily_comparison(
+                date, chart_id, charts_dir, configs, _COMPARISON_DAYS
+            )
+
+            for name, future in futures.items():
+                charts[name] = future.result()
+
+        return charts
+
+    def _render_main_charts(
+        self, data, date, chart_id, charts_dir, minute_series, hourly
+    ) -> Dict:
+        """生成响应时间、成功率趋势图和小时峰值图，返回图表名称到相对路径的映射"""
+        charts = {}
 
         # 创建一个更大的图形，以获得更好的分辨率
-        plt.figure(figsize=(15, 8), dpi=100)
-
-        # 定义颜色循环 - 使用明亮、易区分的颜色
-        colors = [
-            "#1f77b4",
-            "#ff7f0e",
-            "#2ca02c",
-            "#d62728",
-            "#9467bd",
-            "#8c564b",
-            "#e377c2",
-            "#7f7f7f",
-            "#bcbd22",
-            "#17becf",
-        ]
-
-        # 为每个配置绘制响应时间趋势图
+        fig = _new_figure(figsize=(15, 8), dpi=100)
+        ax = fig.subplots()
+
+        # 为每个配置绘制响应时间趋势图，数据点收集后一次绘制
+        points = []
         for i, config in enumerate(data["configs"]):
             # 为每个配置选择一个颜色
-            color = colors[i % len(colors)]
+            color = _PALETTE[i % len(_PALETTE)]
 
-            config_stats = stats_df[stats_df["config_id"] == config.id]
+            if config.id in minute_series:
+                times, avg_times, _ = minute_series[config.id]
 
-            if not config_stats.empty:
-                # 按分钟分组数据
-                minute_groups = config_stats.groupby(
-                    pd.Grouper(key="datetime", freq="1min")
-                )
-
-                # 提取时间和平均响应时间
-                times = []
-                avg_times = []
-
-                for name, group in minute_groups:
-                    if not group.empty:
-                        times.append(name)
-                        avg_times.append(group["avg_response_time"].mean())
-
-                if times:
-                    # 绘制实际数据点 - 使用与线条相同的颜色
-                    plt.scatter(
-                        times,
-                        avg_times,
-                        s=30,
-                        color=color,
-                        alpha=0.6,
-                        label=f"{config.name} (actual data)",
-                    )
+                if len(times):
+                    points.append((times, avg_times, color))
 
                     # 绘制平滑曲线 - 使用与点相同的颜色
-                    try:
-                        import statsmodels.api as sm
-
-                        # 如果数据点足够多，使用LOWESS进行平滑
-                        if len(times) > 10:
-                            x_numeric = np.arange(len(times))
-                            lowess = sm.nonparametric.lowess(
-                                avg_times, x_numeric, frac=0.3
-                            )
-                            # 使用相同的颜色但线条更粗
-                            plt.plot(
-                                times,
-                                lowess[:, 1],
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name} (smooth trend)",
-                            )
-                        else:
-                            # 数据点较少时使用简单连线
-                            plt.plot(
-                                times,
-                                avg_times,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name}",
-                            )
-                    except ImportError:
-                        # 如果没有statsmodels，使用简单的移动平均
-                        window = min(5, len(avg_times))
-                        if window > 1:
-                            smooth_avg = np.convolve(
-                                avg_times, np.ones(window) / window, mode="valid"
-                            )
-                            # 计算合适的时间点，确保对齐
-                            smooth_times = times[window - 1 :]
-                            plt.plot(
-                                smooth_times,
-                                smooth_avg,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name} (smooth trend)",
-                            )
-                        else:
-                            # 数据点太少，直接连线
-                            plt.plot(
-                                times,
-                                avg_times,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name}",
-                            )
+                    self._plot_trend(ax, times, avg_times, color, config.name)
+
+        # 所有配置的实际数据点合并为一个散点集合 - 颜色与各自的线条相同
+        self._scatter_points(ax, points)
 
         # 美化图表
-        plt.title(
+        ax.set_title(
             f'average response time trend ({date.strftime("%Y-%m-%d")})', fontsize=16
         )
-        plt.xlabel("time", fontsize=12)
-        plt.ylabel("average response time (seconds)", fontsize=12)
-        plt.grid(True, linestyle="--", alpha=0.7)
+        ax.set_xlabel("time", fontsize=12)
+        ax.set_ylabel("average response time (seconds)", fontsize=12)
 
         # 优化X轴标签，避免拥挤
-        ax = plt.gca()
+        # 时间已预先转换为Matplotlib日期数值，声明x轴为日期轴
+        ax.xaxis_date()
         # 格式化x轴标签为小时:分钟
         ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
         # 设置合适的刻度间隔
@@ -334,173 +671,95 @@ class HTMLReportGenerator:
         ax.xaxis.set_minor_locator(minutes)
 
         # 旋转标签以防重叠
-        plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        setp(ax.get_xticklabels(), rotation=45, ha="right")
 
         # 添加网格以提高可读性
-        plt.grid(True, which="both", linestyle="--", alpha=0.5)
+        ax.grid(True, which="both", linestyle="--", alpha=0.5)
 
         # 添加图例 - 改进图例位置和样式
-        legend = plt.legend(loc="best", fontsize=10, framealpha=0.7)
+        legend = ax.legend(loc="best", fontsize=10, framealpha=0.7)
         legend.get_frame().set_edgecolor("lightgray")
 
         # 紧凑布局
-        plt.tight_layout()
+        fig.tight_layout()
 
         # 保存图表
         response_time_chart = f"{chart_id}_resp_time.png"
-        plt.savefig(os.path.join(charts_dir, response_time_chart), dpi=100)
-        plt.close()
+        _save_figure(fig, os.path.join(charts_dir, response_time_chart))
 
         # 生成成功率图表 - 使用类似方法并确保使用不同颜色
-        plt.figure(figsize=(15, 8), dpi=100)
+        # 三张主图依次绘制，清空后复用同一个图形和画布
+        fig.clear()
+        ax = fig.subplots()
 
+        points = []
         for i, config in enumerate(data["configs"]):
             # 选择一个唯一的颜色
-            color = colors[i % len(colors)]
-
-            config_stats = stats_df[stats_df["config_id"] == config.id]
+            color = _PALETTE[i % len(_PALETTE)]
 
-            if not config_stats.empty:
-                # 按分钟分组数据
-                minute_groups = config_stats.groupby(
-                    pd.Grouper(key="datetime", freq="1min")
-                )
+            if config.id in minute_series:
+                times, _, success_rates = minute_series[config.id]
 
-                # 提取时间和成功率
-                times = []
-                success_rates = []
-
-                for name, group in minute_groups:
-                    if not group.empty:
-                        times.append(name)
-                        # 计算成功率
-                        success_rate = (
-                            (
-                                group["success_count"].sum()
-                                / group["call_count"].sum()
-                                * 100
-                            )
-                            if group["call_count"].sum() > 0
-                            else 0
-                        )
-                        success_rates.append(success_rate)
-
-                if times:
-                    # 绘制实际数据点 - 使用相同颜色
-                    plt.scatter(
-                        times,
-                        success_rates,
-                        s=30,
-                        color=color,
-                        alpha=0.6,
-                        label=f"{config.name} (actual data)",
-                    )
+                if len(times):
+                    points.append((times, success_rates, color))
 
                     # 绘制平滑曲线 - 使用相同颜色
-                    try:
-                        import statsmodels.api as sm
-
-                        if len(times) > 10:
-                            x_numeric = np.arange(len(times))
-                            lowess = sm.nonparametric.lowess(
-                                success_rates, x_numeric, frac=0.3
-                            )
-                            plt.plot(
-                                times,
-                                lowess[:, 1],
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name} (smooth trend)",
-                            )
-                        else:
-                            plt.plot(
-                                times,
-                                success_rates,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name}",
-                            )
-                    except ImportError:
-                        # 如果没有statsmodels，使用简单的移动平均
-                        window = min(5, len(success_rates))
-                        if window > 1:
-                            smooth_rates = np.convolve(
-                                success_rates, np.ones(window) / window, mode="valid"
-                            )
-                            smooth_times = times[window - 1 :]
-                            plt.plot(
-                                smooth_times,
-                                smooth_rates,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name} (smooth trend)",
-                            )
-                        else:
-                            plt.plot(
-                                times,
-                                success_rates,
-                                color=color,
-                                linestyle="-",
-                                linewidth=2.5,
-                                label=f"{config.name}",
-                            )
+                    self._plot_trend(ax, times, success_rates, color, config.name)
+
+        self._scatter_points(ax, points)
 
         # 美化图表
-        plt.title(f'call success rate trend ({date.strftime("%Y-%m-%d")})', fontsize=16)
-        plt.xlabel("time", fontsize=12)
-        plt.ylabel("success rate (%)", fontsize=12)
-        plt.grid(True, linestyle="--", alpha=0.7)
+        ax.set_title(
+            f'call success rate trend ({date.strftime("%Y-%m-%d")})', fontsize=16
+        )
+        ax.set_xlabel("time", fontsize=12)
+        ax.set_ylabel("success rate (%)", fontsize=12)
 
         # 优化X轴标签
-        ax = plt.gca()
+        ax.xaxis_date()
         ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
         ax.xaxis.set_major_locator(hours)
         ax.xaxis.set_minor_locator(minutes)
 
         # 旋转标签
-        plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        setp(ax.get_xticklabels(), rotation=45, ha="right")
 
         # Y轴范围设置为0-100%
-        plt.ylim(0, 101)
+        ax.set_ylim(0, 101)
 
         # 添加网格
-        plt.grid(True, which="both", linestyle="--", alpha=0.5)
+        ax.grid(True, which="both", linestyle="--", alpha=0.5)
 
         # 添加图例 - 改进图例样式
-        legend = plt.legend(loc="best", fontsize=10, framealpha=0.7)
+        legend = ax.legend(loc="best", fontsize=10, framealpha=0.7)
         legend.get_frame().set_edgecolor("lightgray")
 
         # 紧凑布局
-        plt.tight_layout()
+        fig.tight_layout()
 
         # 保存图表
         success_rate_chart = f"{chart_id}_success_rate.png"
-        plt.savefig(os.path.join(charts_dir, success_rate_chart), dpi=100)
-        plt.close()
+        _save_figure(fig, os.path.join(charts_dir, success_rate_chart))
 
         # 添加小时峰值响应时间图表 - 使用不同颜色
-        plt.figure(figsize=(15, 6), dpi=100)
+        fig.clear()
+        fig.set_size_inches(15, 6)
+        ax = fig.subplots()
 
         for i, config in enumerate(data["configs"]):
             # 选择一个唯一的颜色
-            color = colors[i % len(colors)]
+            color = _PALETTE[i % len(_PALETTE)]
 
-            config_stats = stats_df[stats_df["config_id"] == config.id]
+            config_hourly = self._config_rows(hourly, config.id)
 
-            if not config_stats.empty:
-                # 提取小时
-                config_stats["hour"] = config_stats["datetime"].dt.hour
-
-                # 按小时分组并获取最大响应时间
-                hourly_max = config_stats.groupby("hour")["max_response_time"].max()
+            if config_hourly is not None:
+                # 每小时最大响应时间
+                hourly_max = config_hourly["max_response_time"]
 
                 # 如果有数据，绘制柱状图
                 if not hourly_max.empty:
                     hours = hourly_max.index
-                    plt.bar(
+                    ax.bar(
                         [h + 0.1 * (i + 1) for h in hours],  # 轻微错开不同配置的柱状图
                         hourly_max.values,
                         width=0.2,
@@ -510,62 +769,34 @@ class HTMLReportGenerator:
                     )
 
         # 美化图表
-        plt.title(
+        ax.set_title(
             f'hourly peak response time ({date.strftime("%Y-%m-%d")})', fontsize=16
         )
-        plt.xlabel("hour", fontsize=12)
-        plt.ylabel("peak response time (seconds)", fontsize=12)
-        plt.grid(True, linestyle="--", alpha=0.7)
+        ax.set_xlabel("hour", fontsize=12)
+        ax.set_ylabel("peak response time (seconds)", fontsize=12)
 
         # 设置X轴刻度
-        plt.xticks(range(0, 24))
+        ax.set_xticks(range(0, 24))
 
         # 添加网格
-        plt.grid(True, axis="y", linestyle="--", alpha=0.5)
+        ax.grid(True, axis="y", linestyle="--", alpha=0.5)
 
         # 添加图例 - 改进图例样式
-        legend = plt.legend(loc="best", fontsize=10, framealpha=0.7)
+        legend = ax.legend(loc="best", fontsize=10, framealpha=0.7)
         legend.get_frame().set_edgecolor("lightgray")
 
         # 紧凑布局
-        plt.tight_layout()
+        fig.tight_layout()
 
         # 保存图表
         hourly_peak_chart = f"{chart_id}_hourly_peak.png"
-        plt.savefig(os.path.join(charts_dir, hourly_peak_chart), dpi=100)
-        plt.close()
+        _save_figure(fig, os.path.join(charts_dir, hourly_peak_chart))
 
         # 返回图表路径
         charts["response_time_chart"] = os.path.join("charts", response_time_chart)
         charts["success_rate_chart"] = os.path.join("charts", success_rate_chart)
         charts["hourly_peak_chart"] = os.path.join("charts", hourly_peak_chart)
 
-        # 新增：1. 响应时间分布热图
-        charts["response_time_heatmap"] = self._generate_response_time_heatmap(
-            stats_df, date, chart_id, charts_dir, data["configs"]
-        )
-
-        # 新增：2. 状态码分布图
-        charts["status_code_chart"] = self._generate_status_code_chart(
-            data, date, chart_id, charts_dir
-        )
-
-        # 新增：3. 性能趋势对比图
-        charts["performance_comparison"] = self._generate_performance_comparison(
-            stats_df, date, chart_id, charts_dir, data["configs"]
-        )
-
-        # 新增：4. 可用性雷达图
-        charts["availability_radar"] = self._generate_availability_radar(
-            stats_df, date, chart_id, charts_dir, data["configs"]
-        )
-
-        # 新增：5. 每日对比图（如果有历史数据）
-        past_days = 7
-        charts["daily_comparison"] = self._generate_daily_comparison(
-            date, chart_id, charts_dir, data["configs"], past_days
-        )
-
         return charts
 
     def _generate_response_time_heatmap(
@@ -578,28 +809,32 @@ class HTMLReportGenerator:
         try:
             import seaborn as sns
 
-            # 创建图形
-            plt.figure(figsize=(15, 8))
+            # 创建图形，每个配置一个子图
+            fig = _new_figure(figsize=(15, 8))
+            axes = fig.subplots(len(configs), 1, squeeze=False)[:, 0]
 
-            # 准备热图数据
-            stats_df["hour"] = stats_df["datetime"].dt.hour
-            stats_df["minute_group"] = (
-                stats_df["datetime"].dt.minute // 10
-            ) * 10  # 10分钟一组
+            # 准备热图数据，10分钟一组，分组键直接传入而不写回stats_df
+            minute_group = (stats_df["datetime"].dt.minute // 10 * 10).rename(
+                "minute_group"
+            )
+
+            # 所有配置一次聚合
+            all_heatmaps = (
+                stats_df.groupby(["config_id", minute_group, "hour"])[
+                    "avg_response_time"
+                ]
+                .mean()
+                .unstack("hour")
+            )
 
             # 对于每个配置创建一个热图
             for i, config in enumerate(configs):
-                plt.subplot(len(configs), 1, i + 1)
-
-                config_stats = stats_df[stats_df["config_id"] == config.id]
-                if not config_stats.empty:
-                    # 聚合数据
-                    heatmap_data = config_stats.pivot_table(
-                        index="minute_group",
-                        columns="hour",
-                        values="avg_response_time",
-                        aggfunc="mean",
-                    ).fillna(0)
+                ax = axes[i]
+
+                heatmap_data = self._config_rows(all_heatmaps, config.id)
+                if heatmap_data is not None:
+                    # 只保留该配置有数据的小时
+                    heatmap_data = heatmap_data.dropna(axis=1, how="all").fillna(0)
 
                     # 绘制热图
                     sns.heatmap(
@@ -608,18 +843,18 @@ class HTMLReportGenerator:
                         annot=False,
                         fmt=".2f",
                         cbar_kws={"label": "average response time (seconds)"},
+                        ax=ax,
                     )
 
-                    plt.title(f"{config.name} - response time heatmap")
-                    plt.xlabel("hour")
-                    plt.ylabel("minute (10 minutes group)")
+                    ax.set_title(f"{config.name} - response time heatmap")
+                    ax.set_xlabel("hour")
+                    ax.set_ylabel("minute (10 minutes group)")
 
-            plt.tight_layout()
+            fig.tight_layout()
 
             # 保存图表
             heatmap_file = f"{chart_id}_resp_heatmap.png"
-            plt.savefig(os.path.join(charts_dir, heatmap_file), dpi=100)
-            plt.close()
+            _save_figure(fig, os.path.join(charts_dir, heatmap_file))
 
             return os.path.join("charts", heatmap_file)
         except Exception as e:
@@ -629,34 +864,40 @@ class HTMLReportGenerator:
     def _generate_status_code_chart(self, data, date, chart_id, charts_dir):
         """生成状态码分布图"""
         try:
-            # 获取状态码数据
+            # 一次查询取得所有配置按状态码类别分组的调用数，2xx-5xx以外的类别记为0
+            configs = data["configs"]
+            class_counts = {}
+            with repository.reader_conn() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT config_id,
+                        CASE WHEN status_code BETWEEN 200 AND 599
+                            THEN status_code / 100 ELSE 0 END AS code_class,
+                        COUNT(*) AS count
+                    FROM call_details
+                    WHERE timestamp >= ? AND timestamp < ?
+                        AND config_id IN ({", ".join("?" * len(configs))})
+                    GROUP BY config_id, code_class
+                """,
+                    (*repository.day_range_ms(date), *(c.id for c in configs)),
+                ).fetchall()
+                for row in rows:
+                    class_counts[(row["config_id"], row["code_class"])] = row["count"]
+
+            # 状态码分组，过滤掉计数为0的分组
             status_data = {}
-
-            # 从数据库获取状态码分布
-            with repository.get_connection() as conn:
-                cursor = conn.cursor()
-                for config in data["configs"]:
-                    cursor.execute(
-                        """
-                        SELECT status_code, COUNT(*) as count 
-                        FROM call_details 
-                        WHERE date(timestamp) = ? AND config_id = ?
-                        GROUP BY status_code
-                        ORDER BY count DESC
-                    """,
-                        (date.isoformat(), config.id),
-                    )
-
-                    status_data[config.name] = {
-                        row["status_code"]: row["count"] for row in cursor.fetchall()
-                    }
+            for config in configs:
+                grouped_codes = {
+                    label: class_counts.get((config.id, code_class), 0)
+                    for code_class, label in _STATUS_CLASSES
+                }
+                status_data[config.name] = {
+                    k: v for k, v in grouped_codes.items() if v > 0
+                }
 
             if not status_data or all(not codes for codes in status_data.values()):
                 return None
 
-            # 创建图形
-            plt.figure(figsize=(15, 8))
-
             # 设置颜色映射
             colors = {
                 "2xx": "#2ca02c",  # 成功 - 绿色
@@ -667,33 +908,12 @@ class HTMLReportGenerator:
             }
 
             # 创建子图
-            fig, axes = plt.subplots(
-                len(status_data), 1, figsize=(15, 5 * len(status_data))
-            )
-            if len(status_data) == 1:
-                axes = [axes]
+            fig = _new_figure(figsize=(15, 5 * len(status_data)))
+            axes = fig.subplots(len(status_data), 1, squeeze=False)[:, 0]
 
-            for i, (config_name, codes) in enumerate(status_data.items()):
+            for i, (config_name, grouped_codes) in enumerate(status_data.items()):
                 ax = axes[i]
 
-                # 状态码分组
-                grouped_codes = {"2xx": 0, "3xx": 0, "4xx": 0, "5xx": 0, "other": 0}
-
-                for code, count in codes.items():
-                    if 200 <= code < 300:
-                        grouped_codes["2xx"] += count
-                    elif 300 <= code < 400:
-                        grouped_codes["3xx"] += count
-                    elif 400 <= code < 500:
-                        grouped_codes["4xx"] += count
-                    elif 500 <= code < 600:
-                        grouped_codes["5xx"] += count
-                    else:
-                        grouped_codes["other"] += count
-
-                # 过滤掉计数为0的分组
-                grouped_codes = {k: v for k, v in grouped_codes.items() if v > 0}
-
                 # 计算百分比
                 total = sum(grouped_codes.values())
                 percentages = {k: (v / total) * 100 for k, v in grouped_codes.items()}
@@ -728,12 +948,11 @@ class HTMLReportGenerator:
                     bbox_to_anchor=(1, 0, 0.5, 1),
                 )
 
-            plt.tight_layout()
+            fig.tight_layout()
 
             # 保存图表
             status_code_file = f"{chart_id}_status_codes.png"
-            plt.savefig(os.path.join(charts_dir, status_code_file), dpi=100)
-            plt.close()
+            _save_figure(fig, os.path.join(charts_dir, status_code_file))
 
             return os.path.join("charts", status_code_file)
         except Exception as e:
@@ -741,45 +960,29 @@ class HTMLReportGenerator:
             return None
 
     def _generate_performance_comparison(
-        self, stats_df, date, chart_id, charts_dir, configs
+        self, hourly, date, chart_id, charts_dir, configs
     ):
-        """生成性能趋势对比图"""
-        if stats_df.empty:
+        """生成性能趋势对比图，hourly为_hourly_stats的结果"""
+        if hourly.empty:
             return None
 
         try:
-            # 创建图形
-            plt.figure(figsize=(15, 12))
-
-            # 定义颜色循环
-            colors = [
-                "#1f77b4",
-                "#ff7f0e",
-                "#2ca02c",
-                "#d62728",
-                "#9467bd",
-                "#8c564b",
-                "#e377c2",
-                "#7f7f7f",
-                "#bcbd22",
-                "#17becf",
+            # 每个配置的小时数据只取一次，四个子图共用
+            config_hourlies = [
+                (config, self._config_rows(hourly, config.id)) for config in configs
             ]
 
             # 创建四个子图
-            fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+            fig = _new_figure(figsize=(15, 12))
+            axes = fig.subplots(2, 2)
 
             # 1. 平均响应时间对比
             ax1 = axes[0, 0]
-            for i, config in enumerate(configs):
-                color = colors[i % len(colors)]
-                config_stats = stats_df[stats_df["config_id"] == config.id]
+            for i, (config, config_hourly) in enumerate(config_hourlies):
+                color = _PALETTE[i % len(_PALETTE)]
 
-                if not config_stats.empty:
-                    # 按小时分组
-                    config_stats["hour"] = config_stats["datetime"].dt.hour
-                    hourly_avg = config_stats.groupby("hour")[
-                        "avg_response_time"
-                    ].mean()
+                if config_hourly is not None:
+                    hourly_avg = config_hourly["avg_response_time"]
 
                     ax1.plot(
                         hourly_avg.index,
@@ -798,20 +1001,11 @@ class HTMLReportGenerator:
 
             # 2. 成功率对比
             ax2 = axes[0, 1]
-            for i, config in enumerate(configs):
-                color = colors[i % len(colors)]
-                config_stats = stats_df[stats_df["config_id"] == config.id]
-
-                if not config_stats.empty:
-                    # 按小时分组
-                    config_stats["hour"] = config_stats["datetime"].dt.hour
-                    hourly_success = config_stats.groupby("hour").apply(
-                        lambda x: (
-                            x["success_count"].sum() / x["call_count"].sum() * 100
-                        )
-                        if x["call_count"].sum() > 0
-                        else 0
-                    )
+            for i, (config, config_hourly) in enumerate(config_hourlies):
+                color = _PALETTE[i % len(_PALETTE)]
+
+                if config_hourly is not None:
+                    hourly_success = config_hourly["success_rate"]
 
                     ax2.plot(
                         hourly_success.index,
@@ -829,25 +1023,31 @@ class HTMLReportGenerator:
             ax2.grid(True, linestyle="--", alpha=0.7)
             ax2.legend()
 
+            # 柱状图数据一次展开为(24小时 × 配置)的表，缺少数据的小时补0
+            bar_hours = np.arange(24)
+            hourly_std = (
+                hourly["std_response_time"]
+                .unstack("config_id")
+                .reindex(bar_hours)
+                .fillna(0)
+            )
+            hourly_calls = (
+                hourly["call_count"]
+                .unstack("config_id", fill_value=0)
+                .reindex(bar_hours, fill_value=0)
+            )
+
             # 3. 响应时间稳定性 (用标准差表示)
             ax3 = axes[1, 0]
-            for i, config in enumerate(configs):
-                color = colors[i % len(colors)]
-                config_stats = stats_df[stats_df["config_id"] == config.id]
-
-                if not config_stats.empty:
-                    # 计算每小时响应时间的标准差
-                    config_stats["hour"] = config_stats["datetime"].dt.hour
-                    hourly_std = (
-                        config_stats.groupby("hour")["avg_response_time"]
-                        .std()
-                        .fillna(0)
-                    )
+            for i, (config, config_hourly) in enumerate(config_hourlies):
+                color = _PALETTE[i % len(_PALETTE)]
 
+                if config_hourly is not None:
+                    # 每小时响应时间的标准差
                     ax3.bar(
-                        hourly_std.index
+                        bar_hours
                         + (i * 0.2 - (len(configs) - 1) * 0.1),  # 将柱状图错开
-                        hourly_std.values,
+                        hourly_std[config.id].to_numpy(),
                         width=0.2,
                         color=color,
                         alpha=0.7,
@@ -863,18 +1063,13 @@ class HTMLReportGenerator:
 
             # 4. 调用量对比
             ax4 = axes[1, 1]
-            for i, config in enumerate(configs):
-                color = colors[i % len(colors)]
-                config_stats = stats_df[stats_df["config_id"] == config.id]
-
-                if not config_stats.empty:
-                    # 按小时分组
-                    config_stats["hour"] = config_stats["datetime"].dt.hour
-                    hourly_calls = config_stats.groupby("hour")["call_count"].sum()
+            for i, (config, config_hourly) in enumerate(config_hourlies):
+                color = _PALETTE[i % len(_PALETTE)]
 
+                if config_hourly is not None:
                     ax4.bar(
-                        hourly_calls.index + (i * 0.2 - (len(configs) - 1) * 0.1),
-                        hourly_calls.values,
+                        bar_hours + (i * 0.2 - (len(configs) - 1) * 0.1),
+                        hourly_calls[config.id].to_numpy(),
                         width=0.2,
                         color=color,
                         alpha=0.7,
@@ -888,128 +1083,91 @@ class HTMLReportGenerator:
             ax4.grid(True, linestyle="--", alpha=0.7, axis="y")
             ax4.legend()
 
-            plt.tight_layout()
+            fig.tight_layout()
 
             # 保存图表
             comparison_file = f"{chart_id}_performance_comparison.png"
-            plt.savefig(os.path.join(charts_dir, comparison_file), dpi=100)
-            plt.close()
+            _save_figure(fig, os.path.join(charts_dir, comparison_file))
 
             return os.path.join("charts", comparison_file)
         except Exception as e:
             logger.warning(f"生成性能对比图表时出错: {str(e)}")
             return None
 
-    def _generate_availability_radar(
-        self, stats_df, date, chart_id, charts_dir, configs
-    ):
-        """生成可用性雷达图"""
-        if stats_df.empty:
+    def _generate_availability_radar(self, hourly, date, chart_id, charts_dir, configs):
+        """生成可用性雷达图，hourly为_hourly_stats的结果"""
+        if hourly.empty:
             return None
 
         try:
             # 创建图形
-            plt.figure(figsize=(10, 10))
-
-            # 定义颜色循环
-            colors = [
-                "#1f77b4",
-                "#ff7f0e",
-                "#2ca02c",
-                "#d62728",
-                "#9467bd",
-                "#8c564b",
-                "#e377c2",
-                "#7f7f7f",
-                "#bcbd22",
-                "#17becf",
-            ]
-
-            # 定义雷达图的轴（早上、上午、下午、晚上、凌晨）
-            categories = [
-                "morning (6-9am)",
-                "morning (9-12am)",
-                "afternoon (12-18pm)",
-                "evening (18-24pm)",
-                "night (0-6am)",
-            ]
-            N = len(categories)
+            fig = _new_figure(figsize=(10, 10))
 
             # 设置雷达图
-            angles = [n / float(N) * 2 * np.pi for n in range(N)]
-            angles += angles[:1]  # 闭合雷达图
-
-            ax = plt.subplot(111, polar=True)
+            ax = fig.add_subplot(111, polar=True)
 
             # 设置雷达图的第一个轴在顶部
             ax.set_theta_offset(np.pi / 2)
             ax.set_theta_direction(-1)
 
             # 绘制轴标签
-            plt.xticks(angles[:-1], categories)
+            ax.set_xticks(_RADAR_ANGLES[:-1])
+            ax.set_xticklabels(_RADAR_CATEGORIES)
 
             # 设置y轴范围
             ax.set_ylim(0, 100)
             ax.set_yticks([20, 40, 60, 80, 100])
             ax.set_yticklabels(["20%", "40%", "60%", "80%", "100%"])
 
-            # 为每个配置计算并绘制可用性数据
+            # 将小时汇总结果按查表得到的时段分组，按(配置ID, 时段)合计，
+            # 展开为(配置 × 时段)的表，没有调用的时段为0
+            time_period = _HOUR_PERIODS[hourly.index.get_level_values("hour")]
+            period_totals = (
+                hourly.groupby(["config_id", time_period])[
+                    ["success_count", "call_count"]
+                ]
+                .sum()
+                .unstack(fill_value=0)
+            )
+            periods = range(len(_RADAR_CATEGORIES))
+            calls = period_totals["call_count"].reindex(columns=periods, fill_value=0)
+            successes = period_totals["success_count"].reindex(
+                columns=periods, fill_value=0
+            )
+
+            # 一次计算所有配置各时段的可用性，并重复第一列闭合雷达图数据
+            availability = np.where(
+                calls > 0, successes / np.maximum(calls, 1) * 100, 0
+            )
+            availability = np.column_stack([availability, availability[:, 0]])
+            rows = {config_id: n for n, config_id in enumerate(period_totals.index)}
+
+            # 为每个配置绘制可用性数据
             for i, config in enumerate(configs):
-                color = colors[i % len(colors)]
-                config_stats = stats_df[stats_df["config_id"] == config.id]
-
-                if not config_stats.empty:
-                    # 将时间分组到不同时段
-                    config_stats["hour"] = config_stats["datetime"].dt.hour
-                    config_stats["time_period"] = pd.cut(
-                        config_stats["hour"],
-                        bins=[-1, 5, 8, 11, 17, 23],
-                        labels=[4, 0, 1, 2, 3],  # 映射到雷达图轴的索引
-                    )
+                color = _PALETTE[i % len(_PALETTE)]
 
-                    # 计算每个时段的可用性
-                    availability = []
-                    for period in range(5):  # 5个时段
-                        period_stats = config_stats[
-                            config_stats["time_period"] == period
-                        ]
-                        if not period_stats.empty:
-                            avail = (
-                                (
-                                    period_stats["success_count"].sum()
-                                    / period_stats["call_count"].sum()
-                                    * 100
-                                )
-                                if period_stats["call_count"].sum() > 0
-                                else 0
-                            )
-                            availability.append(avail)
-                        else:
-                            availability.append(0)
-
-                    # 闭合雷达图数据
-                    availability += availability[:1]
+                if config.id in rows:
+                    config_availability = availability[rows[config.id]]
 
                     # 绘制雷达图
                     ax.plot(
-                        angles,
-                        availability,
+                        _RADAR_ANGLES,
+                        config_availability,
                         linewidth=2,
                         linestyle="solid",
                         color=color,
                         label=config.name,
                     )
-                    ax.fill(angles, availability, color=color, alpha=0.1)
+                    ax.fill(_RADAR_ANGLES, config_availability, color=color, alpha=0.1)
 
             # 添加图例
-            plt.legend(loc="upper right", bbox_to_anchor=(0.1, 0.1))
+            ax.legend(loc="upper right", bbox_to_anchor=(0.1, 0.1))
 
-            plt.title("availability in different time periods (%)", size=15, y=1.1)
+            ax.set_title("availability in different time periods (%)", size=15, y=1.1)
 
             # 保存图表
             radar_file = f"{chart_id}_availability_radar.png"
-            plt.savefig(os.path.join(charts_dir, radar_file), dpi=100)
-            plt.close()
+            _save_figure(fig, os.path.join(charts_dir, radar_file))
 
             return os.path.join("charts", radar_file)
         except Exception as e:
@@ -1017,95 +1175,62 @@ class HTMLReportGenerator:
             return None
 
     def _generate_daily_comparison(
-        self, date, chart_id, charts_dir, configs, past_days=7
+        self, date, chart_id, charts_dir, configs, past_days=_COMPARISON_DAYS
     ):
         """生成过去几天的性能对比图"""
         try:
+            # 没有配置时没有可绘制的数据
+            if not configs:
+                return None
+
             # 获取过去几天的日期
             dates = [date - datetime.timedelta(days=i) for i in range(past_days)]
             dates.reverse()  # 按时间升序排列
-
-            # 为每个配置收集每天的平均响应时间和成功率
-            daily_data = {
-                config.id: {"name": config.name, "avg_times": [], "success_rates": []}
-                for config in configs
-            }
             dates_str = [d.strftime("%m-%d") for d in dates]
 
-            # 查询每天数据
-            for day in dates:
-                for config in configs:
-                    with repository.get_connection() as conn:
-                        cursor = conn.cursor()
-
-                        # 查询平均响应时间
-                        cursor.execute(
-                            """
-                            SELECT AVG(avg_response_time) as avg_time
-                            FROM minute_stats
-                            WHERE date(start_time) = ? AND config_id = ?
-                        """,
-                            (day.isoformat(), config.id),
-                        )
-                        result = cursor.fetchone()
-                        avg_time = (
-                            result["avg_time"]
-                            if result and result["avg_time"] is not None
-                            else 0
-                        )
-
-                        # 查询成功率
-                        cursor.execute(
-                            """
-                            SELECT SUM(success_count) as successes, SUM(call_count) as total
-                            FROM minute_stats
-                            WHERE date(start_time) = ? AND config_id = ?
-                        """,
-                            (day.isoformat(), config.id),
-                        )
-                        result = cursor.fetchone()
-                        success_rate = (
-                            (result["successes"] / result["total"] * 100)
-                            if result and result["total"] > 0
-                            else 0
-                        )
-
-                        # 存储数据
-                        daily_data[config.id]["avg_times"].append(avg_time)
-                        daily_data[config.id]["success_rates"].append(success_rate)
-
-            # 检查是否有足够数据绘图
-            has_data = any(len(data["avg_times"]) > 0 for data in daily_data.values())
-            if not has_data:
-                return None
+            # 每个配置每天的平均响应时间和成功率，行为配置、列为日期，没有数据的日期为0
+            day_index = {d.isoformat(): j for j, d in enumerate(dates)}
+            config_index = {config.id: i for i, config in enumerate(configs)}
+            avg_times = np.zeros((len(configs), past_days))
+            success_rates = np.zeros((len(configs), past_days))
+
+            # 一次查询取得整个时间窗口内按(日期, 配置)分组的汇总，直接写入对应位置
+            start, _ = repository.day_range(dates[0])
+            _, end = repository.day_range(date)
+            with repository.reader_conn() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT date(start_time) AS day, config_id,
+                        AVG(avg_response_time) AS avg_time,
+                        SUM(success_count) AS successes, SUM(call_count) AS total
+                    FROM minute_stats
+                    WHERE start_time >= ? AND start_time < ?
+                        AND config_id IN ({", ".join("?" * len(configs))})
+                    GROUP BY day, config_id
+                """,
+                    (start, end, *config_index),
+                ).fetchall()
+            for row in rows:
+                i, j = config_index[row["config_id"]], day_index[row["day"]]
+                if row["avg_time"] is not None:
+                    avg_times[i, j] = row["avg_time"]
+                if row["total"]:
+                    success_rates[i, j] = row["successes"] / row["total"] * 100
 
             # 创建图表
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-
-            # 定义颜色循环
-            colors = [
-                "#1f77b4",
-                "#ff7f0e",
-                "#2ca02c",
-                "#d62728",
-                "#9467bd",
-                "#8c564b",
-                "#e377c2",
-                "#7f7f7f",
-                "#bcbd22",
-                "#17becf",
-            ]
+            fig = _new_figure(figsize=(15, 10))
+            ax1, ax2 = fig.subplots(2, 1)
 
             # 绘制平均响应时间趋势
-            for i, (config_id, data) in enumerate(daily_data.items()):
-                color = colors[i % len(colors)]
+            for i, config in enumerate(configs):
+                color = _PALETTE[i % len(_PALETTE)]
                 ax1.plot(
                     dates_str,
-                    data["avg_times"],
+                    avg_times[i],
                     marker="o",
                     color=color,
                     linewidth=2,
-                    label=data["name"],
+                    label=config.name,
                 )
 
             ax1.set_title("daily average response time trend", fontsize=14)
@@ -1115,15 +1240,15 @@ class HTMLReportGenerator:
             ax1.legend()
 
             # 绘制成功率趋势
-            for i, (config_id, data) in enumerate(daily_data.items()):
-                color = colors[i % len(colors)]
+            for i, config in enumerate(configs):
+                color = _PALETTE[i % len(_PALETTE)]
                 ax2.plot(
                     dates_str,
-                    data["success_rates"],
+                    success_rates[i],
                     marker="o",
                     color=color,
                     linewidth=2,
-                    label=data["name"],
+                    label=config.name,
                 )
 
             ax2.set_title("daily success rate trend", fontsize=14)
@@ -1133,12 +1258,11 @@ class HTMLReportGenerator:
             ax2.grid(True, linestyle="--", alpha=0.7)
             ax2.legend()
 
-            plt.tight_layout()
+            fig.tight_layout()
 
             # 保存图表
             daily_file = f"{chart_id}_daily_comparison.png"
-            plt.savefig(os.path.join(charts_dir, daily_file), dpi=100)
-            plt.close()
+            _save_figure(fig, os.path.join(charts_dir, daily_file))
 
             return os.path.join("charts", daily_file)
         except Exception as e:
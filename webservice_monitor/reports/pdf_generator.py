@@ -7,8 +7,14 @@ import logging
 import datetime
 from typing import Optional
 
+# 缺少Pango等系统库时导入WeasyPrint会抛出OSError
+try:
+    from weasyprint import HTML
+except (ImportError, OSError):
+    HTML = None
+
 from webservice_monitor.reports.html_generator import HTMLReportGenerator
-from webservice_monitor.utils.config import get_setting
+from webservice_monitor.utils.config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +25,7 @@ class PDFReportGenerator:
     def __init__(self):
         """初始化PDF报告生成器"""
         self.html_generator = HTMLReportGenerator()
-        self.report_dir = get_setting("REPORT_DIR", "reports")
+        self.report_dir = SETTINGS.REPORT_DIR
 
         # 确保报告目录存在
         if not os.path.exists(self.report_dir):
@@ -30,24 +36,23 @@ class PDFReportGenerator:
     ) -> str:
         """生成PDF报告并返回文件路径"""
         # 先生成HTML报告
-        html_path = self.html_generator.generate_report(date, config_id)
+        html_path, html_content = self.html_generator.render_report(date, config_id)
 
         # 生成PDF文件名
         pdf_filename = os.path.splitext(os.path.basename(html_path))[0] + ".pdf"
         pdf_path = os.path.join(self.report_dir, pdf_filename)
 
-        try:
-            # 尝试导入WeasyPrint
-            from weasyprint import HTML
+        if HTML is None:
+            logger.warning("未安装WeasyPrint库，无法生成PDF报告")
+            return html_path
 
-            # 将HTML转换为PDF
-            HTML(html_path).write_pdf(pdf_path)
+        try:
+            # 直接转换已渲染的HTML内容，不再重新读取文件；
+            # base_url指向HTML文件，图表的相对路径按报告目录解析
+            HTML(string=html_content, base_url=html_path).write_pdf(pdf_path)
             logger.info(f"已生成PDF报告: {pdf_path}")
 
             return pdf_path
-        except ImportError:
-            logger.warning("未安装WeasyPrint库，无法生成PDF报告")
-            return html_path
         except Exception as e:
             logger.exception(f"生成PDF报告时出错: {str(e)}")
             return html_path
@@ -5,6 +5,7 @@
 import os
 import json
 import logging
+from types import SimpleNamespace
 from typing import Any, Dict, Optional
 
 # 默认配置
@@ -17,15 +18,49 @@ DEFAULT_CONFIG = {
     "LOG_BACKUP_COUNT": 5,
     "MAX_WORKERS": 10,
     "DATA_RETENTION_DAYS": 30,
+    "CHART_MIN_POINTS": 50,  # 统计数据少于此数量时报告不生成图表
+}
+
+
+def _parse_bool(value: str) -> bool:
+    """环境变量字符串转换为布尔值"""
+    return value.lower() in ("true", "yes", "1", "y")
+
+
+# 环境变量覆盖配置项时使用的类型转换函数，按默认值的类型预先确定
+_CONVERTERS = {
+    key: {bool: _parse_bool, int: int, float: float}.get(type(value), str)
+    for key, value in DEFAULT_CONFIG.items()
 }
 
 # 全局配置对象
 _config = DEFAULT_CONFIG.copy()
 
+# 配置的属性视图，加载或修改配置后同步刷新；对象本身不变，导入后始终有效。
+# 频繁读取配置的代码直接访问属性，如SETTINGS.MAX_WORKERS
+SETTINGS = SimpleNamespace(**_config)
+
+
+# 是否已按默认路径加载过配置；已创建（或确认存在）的目录
+_loaded = False
+_ensured_dirs = set()
+
+
+def _refresh_settings():
+    """将_config同步到SETTINGS"""
+    SETTINGS.__dict__.update(_config)
+
 
 def load_config(config_file: Optional[str] = None) -> Dict[str, Any]:
-    """加载配置文件"""
-    global _config
+    """加载配置文件
+
+    未指定配置文件时只在首次调用时查找和读取默认路径，之后直接返回已加载的配置
+    """
+    global _config, _loaded
+
+    if _loaded and not config_file:
+        return _config
+    _loaded = True
 
     # 如果未指定配置文件，尝试默认路径
     if not config_file:
@@ -53,42 +88,41 @@ def load_config(config_file: Optional[str] = None) -> Dict[str, Any]:
         logging.warning("未找到配置文件，使用默认配置")
 
     # 检查环境变量
-    for key in DEFAULT_CONFIG:
+    for key, convert in _CONVERTERS.items():
         env_key = f"WEBSVC_MONITOR_{key}"
         if env_key in os.environ:
             env_value = os.environ[env_key]
 
             # 尝试转换为原始类型
-            original_type = type(DEFAULT_CONFIG[key])
             try:
-                if original_type == bool:
-                    _config[key] = env_value.lower() in ("true", "yes", "1", "y")
-                elif original_type == int:
-                    _config[key] = int(env_value)
-                elif original_type == float:
-                    _config[key] = float(env_value)
-                else:
-                    _config[key] = env_value
-
+                _config[key] = convert(env_value)
                 logging.debug(f"从环境变量加载配置: {key}={_config[key]}")
             except (ValueError, TypeError):
                 _config[key] = env_value
                 logging.warning(
-                    f"无法将环境变量 {env_key} 转换为 {original_type.__name__} 类型"
+                    f"无法将环境变量 {env_key} 转换为 "
+                    f"{type(DEFAULT_CONFIG[key]).__name__} 类型"
                 )
 
-    # 创建必要的目录
+    _ensure_dirs()
+    _refresh_settings()
+    return _config
+
+
+def _ensure_dirs():
+    """创建必要的目录，每个路径只检查一次"""
     for dir_key in ["LOG_DIR", "REPORT_DIR"]:
         dir_path = _config.get(dir_key)
-        if dir_path and not os.path.exists(dir_path):
+        if not dir_path or dir_path in _ensured_dirs:
+            continue
+        _ensured_dirs.add(dir_path)
+        if not os.path.exists(dir_path):
             try:
                 os.makedirs(dir_path, exist_ok=True)
                 logging.debug(f"已创建目录: {dir_path}")
             except Exception as e:
                 logging.error(f"创建目录 {dir_path} 时出错: {str(e)}")
 
-    return _config
-
 
 def get_setting(key: str, default: Any = None) -> Any:
     """获取配置项"""
@@ -98,6 +132,7 @@ def get_setting(key: str, default: Any = None) -> Any:
 def set_setting(key: str, value: Any) -> None:
     """设置配置项"""
     _config[key] = value
+    _refresh_settings()
 
 
 # 初始化时加载配置
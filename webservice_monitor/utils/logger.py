@@ -3,20 +3,70 @@
 """
 
 import os
+import queue
+import atexit
 import logging
 import datetime
-from logging.handlers import RotatingFileHandler
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-from webservice_monitor.utils.config import get_setting
+from webservice_monitor.utils.config import SETTINGS
+
+# 在后台线程中执行实际输出的监听器，记录日志的线程只负责入队
+_listener: Optional[QueueListener] = None
+
+
+class _FastFormatter(logging.Formatter):
+    """固定格式"时间 - [名称 - ]级别 - 消息"的格式化器
+
+    直接拼接字符串，时间用datetime生成，省去time.strftime和%格式替换
+    """
+
+    def __init__(self, include_name: bool = False):
+        super().__init__()
+        self.include_name = include_name
+
+    def formatTime(self, record, datefmt=None):
+        return datetime.datetime.fromtimestamp(record.created).isoformat(
+            sep=" ", timespec="milliseconds"
+        )
+
+    def format(self, record):
+        record.message = record.getMessage()
+        asctime = self.formatTime(record)
+        if self.include_name:
+            s = f"{asctime} - {record.name} - {record.levelname} - {record.message}"
+        else:
+            s = f"{asctime} - {record.levelname} - {record.message}"
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            s = f"{s}\n{record.exc_text}"
+        if record.stack_info:
+            s = f"{s}\n{self.formatStack(record.stack_info)}"
+        return s
+
+
+def _use_direct_handlers():
+    """fork出的子进程中没有监听线程，改为由原处理器直接输出"""
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in _listener.handlers:
+        root_logger.addHandler(handler)
 
 
 def setup_logger():
     """设置日志"""
+    global _listener
+
     # 获取配置
-    log_level = getattr(logging, get_setting("LOG_LEVEL", "INFO"))
-    log_dir = get_setting("LOG_DIR", "logs")
-    max_log_size = get_setting("MAX_LOG_SIZE", 10 * 1024 * 1024)  # 10MB
-    backup_count = get_setting("LOG_BACKUP_COUNT", 5)
+    log_level = getattr(logging, SETTINGS.LOG_LEVEL)
+    log_dir = SETTINGS.LOG_DIR
+    max_log_size = SETTINGS.MAX_LOG_SIZE
+    backup_count = SETTINGS.LOG_BACKUP_COUNT
 
     # 确保日志目录存在
     if not os.path.exists(log_dir):
@@ -36,24 +86,31 @@ def setup_logger():
         # 创建控制台处理器
         console_handler = logging.StreamHandler()
         console_handler.setLevel(log_level)
-        console_formatter = logging.Formatter(
-            "%(asctime)s - %(levelname)s - %(message)s"
-        )
-        console_handler.setFormatter(console_formatter)
+        console_handler.setFormatter(_FastFormatter())
 
         # 创建文件处理器
         file_handler = RotatingFileHandler(
             log_file, maxBytes=max_log_size, backupCount=backup_count
         )
         file_handler.setLevel(log_level)
-        file_formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        file_handler.setFormatter(_FastFormatter(include_name=True))
+
+        # 格式化和写文件、轮转都在监听线程中进行，根日志记录器只挂队列处理器
+        log_queue = queue.SimpleQueue()
+        _listener = QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
         )
-        file_handler.setFormatter(file_formatter)
+        _listener.start()
+        atexit.register(_listener.stop)
+        if hasattr(os, "register_at_fork"):  # Windows没有fork
+            os.register_at_fork(after_in_child=_use_direct_handlers)
+        root_logger.addHandler(QueueHandler(log_queue))
 
-        # 添加处理器到根日志记录器
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
+        # 日志格式不使用线程、进程和调用位置信息，省去每条记录的收集开销
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        logging._srcfile = None
 
     # 设置第三方库的日志级别
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -7,12 +7,23 @@ import json
 from urllib.parse import urlparse
 from typing import Tuple, Dict, Any, Optional
 
+from webservice_monitor.utils import serialization
+
+# 常见的http(s)://域名形式直接由正则判定有效，不匹配时再用urlparse给出具体原因；
+# 域名部分排除方括号，IPv6地址交给urlparse检查
+_URL_RE = re.compile(r"^https?://[^/?#\s\[\]]+(?:[/?#]|$)", re.IGNORECASE)
+# 监控时段：单个小时或以"-"连接的两个小时，数字两侧允许空白（与int()解析一致）
+_HOURS_RE = re.compile(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?")
+
 
 def validate_url(url: str) -> Tuple[bool, str]:
     """验证URL格式是否有效"""
     if not url:
         return False, "URL不能为空"
 
+    if _URL_RE.match(url):
+        return True, "URL格式有效"
+
     try:
         result = urlparse(url)
         if not all([result.scheme, result.netloc]):
@@ -32,7 +43,8 @@ def validate_json(json_str: str) -> Tuple[bool, str, Optional[Dict]]:
         return True, "JSON为空", {}
 
     try:
-        data = json.loads(json_str)
+        # 安装了orjson时由其解析，其JSONDecodeError是json.JSONDecodeError的子类
+        data = serialization.loads(json_str)
         return True, "JSON格式有效", data
     except json.JSONDecodeError as e:
         return False, f"JSON格式无效: {str(e)}", None
@@ -43,25 +55,17 @@ def validate_monitoring_hours(hours_str: str) -> Tuple[bool, str]:
     if not hours_str:
         return False, "监控时段不能为空"
 
-    # 单个小时
-    if hours_str.isdigit():
-        hour = int(hours_str)
-        if 0 <= hour <= 23:
-            return True, "监控时段有效"
-        else:
-            return False, "小时必须在0-23之间"
-
-    # 时段范围
-    if "-" in hours_str:
-        try:
-            start, end = map(int, hours_str.split("-"))
-            if not (0 <= start <= 23 and 0 <= end <= 23):
-                return False, "小时必须在0-23之间"
-            return True, "监控时段有效"
-        except ValueError:
+    # 单个小时(如'9')或时段范围(如'9-17')
+    match = _HOURS_RE.fullmatch(hours_str)
+    if match is None:
+        if "-" in hours_str:
             return False, "监控时段必须是数字或数字范围"
+        return False, "监控时段格式无效，应为单个小时(如'9')或时间范围(如'9-17')"
 
-    return False, "监控时段格式无效，应为单个小时(如'9')或时间范围(如'9-17')"
+    start, end = match.groups()
+    if not (0 <= int(start) <= 23 and (end is None or 0 <= int(end) <= 23)):
+        return False, "小时必须在0-23之间"
+    return True, "监控时段有效"
 
 
 def validate_alert_threshold(threshold: float) -> Tuple[bool, str]: